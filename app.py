@@ -1,16 +1,45 @@
 import streamlit as st
 from checker import update_entry, batch_check
-from cleaner import main as clean_bibtex
+from utils.ieee import DriverPool
+from utils.jobs import JobManager, DONE, FAILED, FINISHED
+from cleaner import clean, CleanOptions
 import tempfile
 import os
 import platform
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.core.os_manager import ChromeType
+import time
 import argparse
 
+
+@st.cache_resource
+def get_checker_pool():
+    """Browsers shared by all checker sessions, so each run does not start its own Chrome."""
+    return DriverPool(size=2)
+
+
+@st.cache_resource
+def get_job_manager():
+    """Checker jobs of all sessions, run side by side off the Streamlit script threads."""
+    return JobManager(max_workers=2)
+
+
+def run_check_job(job, bib_data, num_entries, keep_unselected):
+    """Checks an uploaded .bib file inside a background job, publishing each entry as it resolves."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Named after the job, as the updated file and journal land in the working directory
+        bib_path = os.path.join(tmp_dir, job.id + '.bib')
+        with open(bib_path, 'wb') as f:
+            f.write(bib_data)
+        updated_bib_path = 'updated_' + os.path.basename(bib_path)
+        try:
+            return batch_check(bib_path, num_entries, keep_unselected=keep_unselected,
+                               progress_object=job, use_cache=False, pool=get_checker_pool(), workers=2,
+                               on_result=job.publish, cancel=job.cancel_event)
+        finally:
+            for leftover in (updated_bib_path, updated_bib_path + '.journal', updated_bib_path + '.changes.json'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+
 if "show_welcome" not in st.session_state:
     st.session_state["show_welcome"] = True
 
@@ -33,39 +62,21 @@ if option == "BibTeX Cleaner":
     if st.sidebar.button("**Run BibTeX Cleaner**", type="primary", use_container_width=True):
         st.session_state["show_welcome"] = False  # update here only on button click
         if bib_file and tex_file:
-            with tempfile.NamedTemporaryFile(delete=False) as bib_temp, tempfile.NamedTemporaryFile(delete=False) as tex_temp:
-                bib_temp.write(bib_file.read())
-                tex_temp.write(tex_file.read())
-                
-                bib_temp.close()
-                tex_temp.close()
-
-                cleaned_bib_path = 'cleaned_' + os.path.basename(bib_temp.name)
-                cleaned_tex_path = 'cleaned_' + os.path.basename(tex_temp.name)
-
-                clean_bibtex(bib_temp.name, tex_temp.name, keep_unused, wrap_text, remove_review_textcolor)  # pass new parameter
-                
-                with open(cleaned_bib_path, 'r') as f:
-                    cleaned_bib = f.read()
-
-                with open(cleaned_tex_path, 'r') as f:
-                    cleaned_tex = f.read()
-
-                st.text_area("Cleaned BibTeX", cleaned_bib, height=400)
-                
-                cols_download = st.columns(2)
-                with cols_download[0]:
-                    st.download_button("Download Cleaned BibTeX", cleaned_bib,
-                                       file_name=cleaned_bib_path, mime="text/plain", use_container_width=True)
-                with cols_download[1]:
-                    st.download_button("Download Cleaned TeX", cleaned_tex,
-                                        file_name=cleaned_tex_path, mime="text/plain", use_container_width=True, disabled=not remove_review_textcolor)
-
-
-                os.remove(bib_temp.name)
-                os.remove(tex_temp.name)
-                os.remove(cleaned_bib_path)
-                os.remove(cleaned_tex_path)
+            # Cleaned in memory: uploads never touch the disk
+            result = clean(bib_file.getvalue(), tex_file.getvalue(),
+                           CleanOptions(keep_unused, wrap_text, remove_review_textcolor))
+            cleaned_bib_path = 'cleaned_' + bib_file.name
+            cleaned_tex_path = 'cleaned_' + tex_file.name
+
+            st.text_area("Cleaned BibTeX", result.bib, height=400)
+
+            cols_download = st.columns(2)
+            with cols_download[0]:
+                st.download_button("Download Cleaned BibTeX", result.bib,
+                                   file_name=cleaned_bib_path, mime="text/plain", use_container_width=True)
+            with cols_download[1]:
+                st.download_button("Download Cleaned TeX", result.tex,
+                                    file_name=cleaned_tex_path, mime="text/plain", use_container_width=True, disabled=not remove_review_textcolor)
             st.balloons()  # Raise balloons after cleaner operation completes
         else:
             st.error("Please upload both .bib and .tex files.")
@@ -78,23 +89,43 @@ elif option == "BibTeX Double Checker (Preview)":
     if st.sidebar.button("**Run BibTeX Checker**", type="primary", use_container_width=True):
         st.session_state["show_welcome"] = False  # update here on button click
         if bib_file:
-            progress_bar = st.progress(0, text="It takes time. Please wait or try local deployment.")  # created progress bar
-            with tempfile.NamedTemporaryFile(delete=False) as bib_temp:
-                bib_temp.write(bib_file.read())
-                bib_temp.close()
-                updated_bib_path = 'updated_' + os.path.basename(bib_temp.name)
-                batch_check(bib_temp.name, num_entries, keep_unselected=not remove_unselected,
-                            progress_object=progress_bar)  # pass progress object
-                with open(updated_bib_path, 'r') as f:
-                    updated_bib = f.read()
-                st.text_area("Updated BibTeX", updated_bib, height=400)
-                st.download_button("Download Updated BibTeX", updated_bib,
-                                   file_name=updated_bib_path, mime="text/plain")
-                os.remove(bib_temp.name)
-                os.remove(updated_bib_path)
-            st.balloons()  # Raise balloons after checker operation completes
+            # Runs in the background; the job ID in the URL survives a page refresh
+            st.query_params["job"] = get_job_manager().submit(
+                run_check_job, bib_file.getvalue(), num_entries, not remove_unselected,
+                description=bib_file.name)
         else:
             st.error("Please upload a .bib file.")
+
+    job_id = st.query_params.get("job")
+    job = get_job_manager().get(job_id) if job_id else None
+    if job_id and job is None:
+        st.warning("This checker job has expired. Please run it again.")
+        del st.query_params["job"]
+    elif job:
+        st.session_state["show_welcome"] = False
+        state = job.snapshot()
+        st.progress(state["progress"], text=f"{state['description']}: {state['status']} "
+                                            f"({len(state['results'])} entries checked)")
+        if state["status"] in FINISHED:
+            if state["status"] == DONE:
+                st.text_area("Updated BibTeX", state["output"], height=400)
+                st.download_button("Download Updated BibTeX", state["output"],
+                                   file_name='updated_' + state["description"], mime="text/plain")
+                st.balloons()  # Raise balloons after checker operation completes
+            elif state["status"] == FAILED:
+                st.error(f"The checker failed: {state['error']}")
+            else:
+                st.info("The checker job was cancelled.")
+            if st.button("Dismiss"):
+                del st.query_params["job"]
+                st.rerun()
+        else:
+            if st.button("Cancel checker job"):
+                get_job_manager().cancel(job_id)
+            for key, entry in state["results"]:  # Published as each entry resolves
+                st.code(entry, language="latex")
+            time.sleep(1)
+            st.rerun()
 elif option == "Donate":
     st.markdown("## Donate")
     st.markdown(
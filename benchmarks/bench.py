@@ -0,0 +1,171 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cleaner
+from benchmarks.generate import generate_bib, generate_tex
+from utils.latex import scan_project
+from utils.textcolor import remove_textcolor
+
+STAGES = ('parse_bib_entries', 'extract_citations', 'write_cleaned_bib', 'remove_textcolor', 'main')
+
+
+def measure(fn, repeat=3):
+    """Times a function and records its peak memory.
+
+    The function's output is discarded. Peak memory is measured with
+    `tracemalloc` in a separate, untimed run, as tracing slows Python down.
+
+    Args:
+        fn (callable): Function without arguments.
+        repeat (int, optional): Number of timed runs. Defaults to 3.
+
+    Returns:
+        dict: Best and mean wall time in seconds and peak traced memory in bytes.
+    """
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {'seconds': min(times), 'mean_seconds': sum(times) / len(times), 'peak_bytes': peak}
+
+
+def bench_size(num_entries, work_dir, stages=STAGES, repeat=3, seed=0):
+    """Generates inputs of one size and benchmarks the cleaner stages on them.
+
+    Args:
+        num_entries (int): Number of .bib entries. The manuscript grows with it.
+        work_dir (str): Scratch directory for the generated and cleaned files.
+        stages (iterable, optional): Names from `STAGES` to run. Defaults to all.
+        repeat (int, optional): Timed runs per stage. Defaults to 3.
+        seed (int, optional): Random seed of the generators. Defaults to 0.
+
+    Returns:
+        dict: Measurements per `"<stage>[n=<num_entries>]"`.
+    """
+    bib_name = os.path.join(work_dir, 'ref.bib')
+    keys = generate_bib(bib_name, num_entries, seed)
+    tex_name = generate_tex(work_dir, keys, num_paragraphs=min(max(50, num_entries // 5), 20000), seed=seed)
+    out_dir = os.path.join(work_dir, 'out')
+    os.makedirs(out_dir, exist_ok=True)
+
+    with open(bib_name, 'r', encoding='utf-8') as f:
+        bib = f.read()
+    _, _, scans = scan_project(tex_name)
+    tex = ''
+    for path in scans:  # The whole project as one manuscript
+        with open(path, 'r', encoding='utf-8') as f:
+            tex += f.read()
+    flat_tex = os.path.join(work_dir, 'flat.tex')
+    with open(flat_tex, 'w', encoding='utf-8') as f:
+        f.write(tex)
+    entries = cleaner.parse_bib_entries(bib)
+    citations = cleaner.extract_citations(tex)
+
+    benchmarks = {
+        'parse_bib_entries': lambda: cleaner.parse_bib_entries(bib),
+        'extract_citations': lambda: cleaner.extract_citations(tex),
+        'write_cleaned_bib': lambda: cleaner.write_cleaned_bib(dict(entries), citations, True, True),
+        'remove_textcolor': lambda: remove_textcolor(flat_tex, os.path.join(out_dir, 'flat.tex')),
+        'main': lambda: cleaner.main(bib_name, tex_name, True, True, True, use_cache=False, out_dir=out_dir),
+    }
+    results = {}
+    for stage in stages:
+        name = f'{stage}[n={num_entries}]'
+        results[name] = measure(benchmarks[stage], repeat)
+        results[name]['input_bytes'] = len(bib) if stage in ('parse_bib_entries', 'main') else len(tex)
+        print(f"{name:40} {results[name]['seconds'] * 1000:10.1f} ms {results[name]['peak_bytes'] / 2 ** 20:10.1f} MiB")
+    return results
+
+
+def compare(results, baseline, threshold=0.1, min_seconds=0.005):
+    """Compares results against a baseline run.
+
+    Args:
+        results (dict): Measurements as returned by `bench_size`.
+        baseline (dict): Measurements of the baseline run.
+        threshold (float, optional): Allowed relative slowdown or memory growth. Defaults to 10%.
+        min_seconds (float, optional): Timings below this are too noisy to flag. Defaults to 5 ms.
+
+    Returns:
+        list: Descriptions of the regressions.
+    """
+    regressions = []
+    for name in sorted(results.keys() & baseline.keys()):
+        new, old = results[name], baseline[name]
+        time_ratio = new['seconds'] / old['seconds'] if old['seconds'] else 1.0
+        memory_ratio = new['peak_bytes'] / old['peak_bytes'] if old['peak_bytes'] else 1.0
+        flags = []
+        if time_ratio > 1 + threshold and new['seconds'] >= min_seconds:
+            flags.append('time')
+        if memory_ratio > 1 + threshold:
+            flags.append('memory')
+        print(f"{name:40} time x{time_ratio:5.2f}  memory x{memory_ratio:5.2f}  {' '.join(flags) or 'ok'}")
+        if flags:
+            regressions.append(f"{name}: {' and '.join(flags)} regressed "
+                               f"(time x{time_ratio:.2f}, memory x{memory_ratio:.2f})")
+    return regressions
+
+
+def run(sizes, stages=STAGES, repeat=3, seed=0):
+    """Benchmarks every size in a fresh scratch directory.
+
+    Returns:
+        dict: The report, with environment metadata and the measurements.
+    """
+    results = {}
+    for num_entries in sizes:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results.update(bench_size(num_entries, work_dir, stages, repeat, seed))
+    return {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'repeat': repeat, 'seed': seed},
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the BibTeX cleaner on synthetic inputs.')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Comma-separated .bib sizes in entries (default: 1000,10000,100000)')
+    parser.add_argument('--stages', default=','.join(STAGES), help=f'Comma-separated stages to run (default: {",".join(STAGES)})')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage; the best is reported (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the generators (default: 0)')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to check the results against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative slowdown or memory growth flagged as a regression (default: 0.1)')
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    report = run([int(size) for size in args.sizes.split(',')], stages, args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved as {args.output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report['results'], baseline['results'], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,139 @@
+import os
+import random
+
+ENTRY_TYPES = ('article', 'inproceedings', 'misc', 'book', 'phdthesis')
+_WORDS = ('learning', 'neural', 'graph', 'audio', 'visual', 'timbre', 'shape', 'network', 'adaptive',
+          'robust', 'efficient', 'sparse', 'deep', 'vehicular', 'secure', 'scheme', 'model', 'analysis',
+          'music', 'gesture', 'sensor', 'crowdsensing', 'authentication', 'correspondence', 'estimation')
+_ACRONYMS = ('CNN', 'IEEE', 'GPU', 'LSTM', 'MIDI', 'VANET', 'RL')
+_NAMES = ('Adeli', 'Rouat', 'Molotchnikoff', 'Smith', 'Zhang', 'Garcia', 'M{\\"u}ller', 'St{\\\'e}phane', 'Li')
+
+
+def _words(rng, count):
+    return ' '.join(rng.choice(_WORDS) for _ in range(count))
+
+
+def _title(rng):
+    """A title with some nested braces, as reference managers write them."""
+    words = _words(rng, rng.randint(4, 14)).split()
+    for _ in range(rng.randint(0, 2)):
+        words.insert(rng.randrange(len(words) + 1), '{' + rng.choice(_ACRONYMS) + '}')
+    if rng.random() < 0.2:
+        words.insert(0, '{{' + rng.choice(_ACRONYMS) + '}-based}')
+    return ' '.join(words).capitalize()
+
+
+def bib_entry(rng, key):
+    """Generates one BibTeX entry with field sizes drawn from a long-tailed distribution.
+
+    Args:
+        rng (random.Random): Source of randomness.
+        key (str): Citation key of the entry.
+
+    Returns:
+        str: The entry.
+    """
+    fields = [
+        ('title', '{' + _title(rng) + '}'),
+        ('author', '{' + ' and '.join(f'{rng.choice(_NAMES)}, {rng.choice("ABCDEFGH")}.'
+                                      for _ in range(rng.randint(1, 8))) + '}'),
+        ('year', '{' + str(rng.randint(1970, 2025)) + '}'),
+    ]
+    if rng.random() < 0.6:
+        fields.append(('journal', '{' + _words(rng, rng.randint(2, 6)).title() + '}'))
+    if rng.random() < 0.5:
+        fields.append(('doi', '{10.' + str(rng.randint(1000, 9999)) + '/' + str(rng.randint(10 ** 5, 10 ** 7)) + '}'))
+    if rng.random() < 0.4:  # Abstracts dominate the size of real-world bibliographies
+        fields.append(('abstract', '{' + _words(rng, int(rng.paretovariate(1.5) * 40)) + '.}'))
+    if rng.random() < 0.2:
+        fields.append(('keywords', '{' + ','.join(_words(rng, rng.randint(2, 8)).split()) + '}'))
+    if rng.random() < 0.1:
+        fields.append(('note', '"' + _words(rng, rng.randint(3, 10)) + '"'))
+    body = ',\n'.join(f'  {name} = {value}' for name, value in fields)
+    return f'@{rng.choice(ENTRY_TYPES)}{{{key},\n{body}\n}}\n'
+
+
+def generate_bib(path, num_entries, seed=0):
+    """Writes a synthetic .bib file, streaming so that millions of entries fit in memory.
+
+    Besides entries it contains `%` comment lines, `@comment` blocks and
+    `@string` definitions, which the cleaner has to skip.
+
+    Args:
+        path (str): Output path.
+        num_entries (int): Number of entries.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        list: The citation keys, in file order.
+    """
+    rng = random.Random(seed)
+    keys = []
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('@string{ieee = "IEEE Transactions"}\n\n')
+        for i in range(num_entries):
+            key = f'{rng.choice(_WORDS)[:3]}{i}{rng.choice(_WORDS).capitalize()}'
+            keys.append(key)
+            if rng.random() < 0.02:
+                f.write(f'% Imported from {rng.choice(_WORDS)} library\n')
+            if rng.random() < 0.01:
+                f.write('@comment{jabref-meta: databaseType:bibtex;}\n\n')
+            f.write(bib_entry(rng, key))
+            f.write('\n')
+    return keys
+
+
+def _colored(rng, text, depth):
+    """Wraps text in up to `depth` nested review markup commands."""
+    for _ in range(rng.randint(1, depth)):
+        text = f'\\textcolor{{{rng.choice(("red", "red", "blue"))}}}{{{text}}}'
+    return text
+
+
+def generate_tex(out_dir, keys, num_paragraphs=200, cite_density=0.5, color_density=0.2, color_depth=3,
+                 chapters=4, seed=0):
+    """Writes a synthetic LaTeX project whose root file `\\input`s its chapters.
+
+    Args:
+        out_dir (str): Directory to write `main.tex` and `chapters/*.tex` to.
+        keys (list): Citation keys available in the bibliography.
+        num_paragraphs (int, optional): Paragraphs across all chapters. Defaults to 200.
+        cite_density (float, optional): Citation commands per sentence. Defaults to 0.5.
+        color_density (float, optional): Share of sentences wrapped in `\\textcolor`. Defaults to 0.2.
+        color_depth (int, optional): Maximum nesting of `\\textcolor`. Defaults to 3.
+        chapters (int, optional): Number of chapter files. Defaults to 4.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        str: Path of the root `main.tex`.
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(out_dir, 'chapters'), exist_ok=True)
+    commands = ('cite', 'citep', 'citet', 'parencite', 'autocite')
+    sentences_per_paragraph = 6
+
+    for chapter in range(chapters):
+        paragraphs = []
+        for _ in range(max(1, num_paragraphs // chapters)):
+            sentences = []
+            for _ in range(sentences_per_paragraph):
+                sentence = _words(rng, rng.randint(6, 20)).capitalize()
+                if keys and rng.random() < cite_density:
+                    cited = ','.join(rng.choice(keys) for _ in range(rng.randint(1, 4)))
+                    sentence += f' \\{rng.choice(commands)}{{{cited}}}'
+                if rng.random() < color_density:
+                    sentence = _colored(rng, sentence, color_depth)
+                sentences.append(sentence + '.')
+            if rng.random() < 0.05:
+                paragraphs.append(f'% \\cite{{{rng.choice(keys) if keys else "none"}}} was dropped')
+            paragraphs.append(' '.join(sentences))
+        with open(os.path.join(out_dir, 'chapters', f'chapter{chapter}.tex'), 'w', encoding='utf-8') as f:
+            f.write(f'\\section{{Chapter {chapter}}}\n\n' + '\n\n'.join(paragraphs) + '\n')
+
+    root = os.path.join(out_dir, 'main.tex')
+    with open(root, 'w', encoding='utf-8') as f:
+        f.write('\\documentclass{article}\n\\usepackage{xcolor}\n\\begin{document}\n\n')
+        for chapter in range(chapters):
+            f.write(f'\\input{{chapters/chapter{chapter}}}\n')
+        f.write('\n\\bibliographystyle{plain}\n\\bibliography{ref}\n\\end{document}\n')
+    return root
@@ -1,56 +1,387 @@
-import re
 import argparse
-import time
 import os  # Add if not already imported
-from utils.ieee import search_ieee, fetch_bibtex
-from utils.bib import parse_bib_file, extract_title
-from tqdm import tqdm
+import json
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from utils.ieee import (search_ieee, fetch_bibtex, fetch_bibtex_http, document_url, document_number, is_timeout,
+                        DriverPool, IEEE_XPLORE_URL)
+from utils.doi import doi_url, is_doi_url, is_ieee_doi, resolve_doi, fetch_doi_bibtex
+from utils.ratelimit import TokenBucket
+from utils.lookupcache import LookupCache, MISSING, DEFAULT_CACHE_PATH
+from utils.dumpindex import DumpIndex
+from utils.ledger import (VerificationLedger, DEFAULT_LEDGER_PATH, UPDATED, CONFIRMED, NOT_FOUND, FAILED,
+                          field_changes)
+from utils.bib import BibEntry, parse_bib_file, normalize_title
+from utils.metrics import get_metrics, profiled
+from utils.pipeline import Stage, run_pipeline
 
 
-def update_entry(original_key, original_entry):
+def update_entry(original_key, original_entry, pool=None, limiter=None, cache=None, offline=False, dump=None,
+                 crossref=False):
     """Searches IEEE for the title, fetches the updated BibTeX, and keeps the original key.
 
+    With a local metadata dump, the entry is looked up there first (by DOI,
+    then by title) and IEEE is only searched if the dump has no match.
+    Entries that already name their IEEE Xplore page (`url` or `arnumber`)
+    or carry an IEEE DOI skip the title search: the BibTeX is fetched
+    directly from the paper page the DOI resolves to. With `crossref`, the
+    BibTeX of other publishers' DOIs is taken from the DOI resolver.
+
+    `batch_check` runs the same steps as overlapping pipeline stages.
+
     Args:
         original_key (str): The original key of the BibTeX entry.
         original_entry (str): The original BibTeX entry.
+        pool (DriverPool, optional): Pool to borrow browsers from. Defaults to the process-wide pool.
+        limiter (TokenBucket, optional): Rate limiter for page loads. Defaults to the process-wide limiter.
+        cache (LookupCache, optional): Cache consulted before, and filled after, each network lookup.
+        offline (bool, optional): Only use cached lookups (expired ones included) and never
+            touch the network. Defaults to False.
+        dump (DumpIndex, optional): Indexed metadata dump consulted before IEEE.
+        crossref (bool, optional): Also accept Crossref/DataCite BibTeX for DOIs that IEEE
+            did not register. Defaults to False.
 
     Returns:
         str: The updated BibTeX entry with the original key, or the original entry if no update is found.
     """
-    title = extract_title(original_entry)
+    bibtex, title = _resolve(original_entry, pool, limiter, cache, offline, dump, crossref)
+    if bibtex is None and title:
+        link = _search(title, pool, limiter, cache, offline)
+        if link:
+            bibtex = _lookup_bibtex(link, pool, limiter, cache, offline)
+    if not bibtex:
+        return original_entry  # No valid BibTeX found, keep original
+    return _with_key(bibtex, original_key)
+
+
+def _resolve(original_entry, pool, limiter, cache, offline, dump, crossref=False):
+    """Looks an entry up without a title search: in the dump, then through its own links.
+
+    Returns:
+        tuple: `(bibtex, None)` if found, otherwise `(None, title)` to search for.
+    """
+    metrics = get_metrics()
+    entry = BibEntry.from_text(original_entry)
+    if dump is not None:
+        bibtex = dump.resolve(entry)
+        metrics.count('dump_miss' if bibtex is None else 'dump_hit')
+        if bibtex:
+            return bibtex, None
+
+    doi_link = doi_url(entry.doi) if crossref or is_ieee_doi(entry.doi) else None
+    for link in filter(None, (document_url(entry), doi_link)):
+        metrics.count('direct_lookup')
+        try:
+            bibtex = _lookup_bibtex(link, pool, limiter, cache, offline)
+        except Exception as e:
+            if not isinstance(e, OSError) and not is_timeout(e):
+                raise
+            print(f"Direct lookup of {link} failed: {e!r}")
+            continue  # Fall back to the title search
+        if bibtex:
+            return bibtex, None
+    return None, entry.title
+
+
+def _search(title, pool, limiter, cache, offline):
+    """Returns the IEEE Xplore page found for a title, from `cache` if possible, or None.
+
+    An empty result page raises `EmptyResultPage` and is not cached, so that a
+    throttled search is retried instead of being remembered as "not found".
+    """
     print(title)
-    if not title:
-        return original_entry  # If no title, keep the original entry
+    metrics = get_metrics()
+    normalized = normalize_title(title)
+    link = cache.get_search(normalized, allow_stale=offline) if cache else MISSING
+    if cache:
+        metrics.count('search_cache_miss' if link is MISSING else 'search_cache_hit')
+    if link is MISSING:
+        if offline:
+            return None  # Nothing cached and no network allowed
+        link = search_ieee(title, pool, limiter)
+        if cache:
+            cache.put_search(normalized, link)
+    return link
 
-    link = search_ieee(title)
-    if not link:
-        return original_entry  # No valid link found, keep original
 
-    bibtex = fetch_bibtex(link)
-    if not bibtex:
-        return original_entry  # No valid BibTeX found, keep original
+def _lookup_bibtex(link, pool, limiter, cache, offline):
+    """Returns the BibTeX behind a paper or DOI link, from `cache` if possible, or None."""
+    metrics = get_metrics()
+    bibtex = cache.get_bibtex(link, allow_stale=offline) if cache else MISSING
+    if cache:
+        metrics.count('bibtex_cache_miss' if bibtex is MISSING else 'bibtex_cache_hit')
+    if bibtex is MISSING:
+        if offline:
+            return None
+        bibtex = _fetch_bibtex(link, pool, limiter)
+        if cache:
+            cache.put_bibtex(link, bibtex)
+    return bibtex
 
-    # Replace the key in the new BibTeX
-    updated_entry = re.sub(r'(@\w+\{)[^,]+', rf'\g<1>{original_key}', bibtex, count=1)
-    return updated_entry
 
+def _fetch_bibtex(link, pool, limiter):
+    """Fetches BibTeX over plain HTTP where possible, through the "Cite This" dialog otherwise.
 
-def batch_check(bib_name, num_entries=60, keep_unselected=True, progress_object=None):  # changed code: added progress_object parameter
-    """Processes the first `num_entries` in the .bib file, updates them,
-       and writes a new file. Optionally keeps unselected entries.
-       Reports progress via the provided progress_object (e.g., st.progress).
+    DOI links are followed to the IEEE Xplore page they resolve to; only DOIs
+    that lead elsewhere are fetched from the resolver.
     """
-    bib_entries = parse_bib_file(bib_name)
+    if is_doi_url(link):
+        number = document_number(resolve_doi(link))
+        if number is None:
+            return fetch_doi_bibtex(link)
+        link = f"{IEEE_XPLORE_URL}/document/{number}"
+    try:
+        bibtex = fetch_bibtex_http(link, limiter)
+    except OSError as e:
+        print(f"Plain HTTP fetch of {link} failed: {e!r}")
+        bibtex = None
+    return bibtex or fetch_bibtex(link, pool, limiter)
+
+
+def _with_key(bibtex, original_key):
+    """Replaces the key of a found BibTeX entry with the original one."""
+    get_metrics().count('entries_updated')
+    updated_entry = BibEntry.from_text(bibtex)
+    updated_entry.set_key(original_key)
+    return str(updated_entry)
+
+
+@dataclass
+class _Lookup:
+    """The state of one entry on its way through the checking pipeline."""
+    key: str
+    entry: str
+    started: float = 0.0
+    title: str = None
+    link: str = None
+    bibtex: str = None
+    error: Exception = None
+    cancelled: bool = False
+
+
+def _stage(step, cancel, *args):
+    """Wraps a pipeline step so that a failure is recorded on the lookup and later steps skip it.
+
+    Once `cancel` is set, lookups still queued are marked as cancelled instead.
+    """
+    def run(lookup):
+        if lookup.error is None and not lookup.cancelled:
+            if cancel is not None and cancel.is_set():
+                lookup.cancelled = True
+                return lookup
+            try:
+                step(lookup, *args)
+            except Exception as e:
+                lookup.error = e
+        return lookup
+    return run
+
+
+def _resolve_step(lookup, pool, limiter, cache, offline, dump, crossref):
+    lookup.started = time.perf_counter()
+    lookup.bibtex, lookup.title = _resolve(lookup.entry, pool, limiter, cache, offline, dump, crossref)
+
+
+def _search_step(lookup, pool, limiter, cache, offline):
+    if lookup.bibtex is None and lookup.title:
+        lookup.link = _search(lookup.title, pool, limiter, cache, offline)
+
+
+def _fetch_step(lookup, pool, limiter, cache, offline):
+    if lookup.bibtex is None and lookup.link:
+        lookup.bibtex = _lookup_bibtex(lookup.link, pool, limiter, cache, offline)
+
+
+def read_journal(journal_name):
+    """Reads the per-entry results recorded by an earlier, possibly interrupted, run.
+
+    Args:
+        journal_name (str): Path of the journal file.
+
+    Returns:
+        dict: Mapping from key to checked entry. A truncated last line is ignored.
+    """
+    return {key: record['entry'] for key, record in read_journal_records(journal_name).items()}
+
+
+def read_journal_records(journal_name):
+    """Reads the journal like `read_journal`, keeping each entry's whole record.
+
+    Returns:
+        dict: Mapping from key to `{"key", "entry", "outcome", ...}` as written by `batch_check`.
+    """
+    records = {}
+    if not os.path.exists(journal_name):
+        return records
+    with open(journal_name, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partially written when the run died
+            records[record['key']] = record
+    return records
+
+
+def open_journal(journal_name, resume):
+    """Opens the journal for writing, keeping the records of an interrupted run with `resume`.
+
+    A last line cut short by a crash is truncated away first, so that the next
+    record starts on a line of its own.
+
+    Args:
+        journal_name (str): Path of the journal file.
+        resume (bool): Append to the existing journal instead of starting a new one.
+
+    Returns:
+        file: The journal, opened for text writing.
+    """
+    if not resume or not os.path.exists(journal_name):
+        return open(journal_name, 'w', encoding='utf-8')
+    with open(journal_name, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+    return open(journal_name, 'a', encoding='utf-8')
+
+
+def _check_outcome(lookup):
+    """Returns the output entry of a finished lookup and its journal record."""
+    if lookup.error is not None:
+        return lookup.entry, {'outcome': FAILED, 'error': repr(lookup.error)}
+    if not lookup.bibtex:
+        return lookup.entry, {'outcome': NOT_FOUND}
+    entry = _with_key(lookup.bibtex, lookup.key)
+    changes = field_changes(lookup.entry, entry)
+    return entry, {'outcome': UPDATED, 'changes': changes} if changes else {'outcome': CONFIRMED}
+
+
+def write_changes(changes_name, bib_name, records):
+    """Writes the machine-readable report of what a run did to each entry.
+
+    Args:
+        changes_name (str): Output path.
+        bib_name (str): The checked .bib file.
+        records (list): Journal records of the checked entries, in file order.
+    """
+    summary = {}
+    for record in records:
+        outcome = record.get('outcome') or 'unknown'  # Journals written before outcomes were recorded
+        summary[outcome] = summary.get(outcome, 0) + 1
+    report = {'bib': bib_name, 'checked': time.time(), 'summary': summary,
+              'entries': {record['key']: {name: value for name, value in record.items() if name not in ('key', 'entry')}
+                          for record in records}}
+    with open(changes_name, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Changes saved as {changes_name}")
+
+
+def batch_check(bib_name, num_entries=60, keep_unselected=True, progress_object=None, use_cache=True,
+                pool=None, max_pages=50, workers=1, limiter=None, cache=None,
+                offline=False, resume=False, on_result=None, cancel=None, dump=None,
+                ledger=None, only_changed=False, max_age=None, crossref=False):
+    """Checks the first `num_entries` entries of a .bib file and writes the updated file.
+
+    Entries stream through a pipeline of stages connected by bounded queues:
+    direct lookups (dump, IEEE URL, DOI), the IEEE title search and the BibTeX
+    fetch each run in `workers` threads, so the search for one entry overlaps
+    with the fetch for the previous one. Key rewriting and journaling happen in
+    the calling thread. Every result is appended to `updated_<name>.journal`
+    as soon as it is known and the output is assembled from that journal.
+    What happened to each entry is written to `updated_<name>.changes.json`.
+
+    Args:
+        bib_name (str): The .bib file to check.
+        num_entries (int, optional): Number of entries to check. Defaults to 60.
+        keep_unselected (bool, optional): Append the unchecked entries to the output. Defaults to True.
+        progress_object (optional): Receives `progress(fraction)` calls, e.g. `st.progress`.
+        use_cache (bool, optional): Use the sidecar parse index of the .bib file. Defaults to True.
+        pool (DriverPool, optional): Browsers to borrow. Defaults to a private pool of one
+            browser per search and fetch worker, shut down at the end.
+        max_pages (int, optional): Pages after which a browser of the private pool is recycled. Defaults to 50.
+        workers (int, optional): Threads per pipeline stage. Defaults to 1.
+        limiter (TokenBucket, optional): Rate limiter shared by all page loads.
+            Defaults to the process-wide one.
+        cache (LookupCache, optional): Cache of IEEE lookups.
+        offline (bool, optional): Only use cached lookups. Defaults to False.
+        resume (bool, optional): Skip the keys already in the journal of an interrupted run. Defaults to False.
+        on_result (function, optional): Called as `on_result(key, entry)` for each result as it resolves.
+        cancel (threading.Event, optional): Once set, the run stops after the steps in
+            progress and the journal is kept for `resume`.
+        dump (DumpIndex, optional): Indexed metadata dump to verify entries against before IEEE.
+        ledger (VerificationLedger, optional): Records the outcome of every checked entry
+            of a completed run, keyed by the entry's content hash.
+        only_changed (bool, optional): Reuse the earlier result of entries the ledger has
+            a successful check of. Defaults to False.
+        max_age (float, optional): With `only_changed`, check entries again whose last
+            check is older than this many seconds.
+        crossref (bool, optional): Also verify entries with other publishers' DOIs
+            against Crossref/DataCite BibTeX. Defaults to False.
+
+    Returns:
+        str: The updated BibTeX, or None if the run was cancelled.
+    """
+    bib_entries = parse_bib_file(bib_name, use_cache)
 
     keys = list(bib_entries.keys())[:num_entries]
-    updated_bib_entries = {}
     total = len(keys)  # total entries to process
+    updated_filename = 'updated_' + os.path.basename(bib_name)
+    journal_name = updated_filename + '.journal'
+    finished = read_journal(journal_name) if resume else {}
+    pending = [key for key in keys if key not in finished]
+    if resume:
+        print(f"Resuming: {total - len(pending)} of {total} entries already checked")
+
+    metrics = get_metrics()
+    done = total - len(pending)
 
-    for i, key in enumerate(keys):  # changed code: using index to update progress_object
-        updated_bib_entries[key] = update_entry(key, bib_entries[key])
+    def journal_result(key, entry, record):
+        nonlocal done
+        journal.write(json.dumps({'key': key, 'entry': entry, **record}) + '\n')
+        journal.flush()  # Survive a crash or a killed session
+        if on_result:
+            on_result(key, entry)
+        done += 1
         if progress_object:
-            progress_object.progress((i + 1) / total)  # update progress bar
-        time.sleep(1)  # Avoid being rate-limited by IEEE Xplore
+            progress_object.progress(done / total)  # update progress bar
+
+    private_pool = DriverPool(size=2 * workers, max_pages=max_pages) if pool is None else nullcontext(pool)
+    with open_journal(journal_name, resume) as journal, private_pool as pool:
+        if ledger is not None and only_changed:
+            changed = []
+            for key in pending:
+                verified = ledger.get(bib_entries[key], max_age)
+                if verified is None or verified[0] == FAILED:
+                    changed.append(key)
+                else:
+                    outcome, result, when = verified
+                    journal_result(key, result, {'outcome': 'reused', 'previous': outcome, 'verified': when})
+            metrics.count('entries_reused', len(pending) - len(changed))
+            print(f"Only changed: checking {len(changed)} of {len(pending)} entries")
+            pending = changed
+        stages = [Stage('resolve', _stage(_resolve_step, cancel, pool, limiter, cache, offline, dump, crossref), workers),
+                  Stage('search', _stage(_search_step, cancel, pool, limiter, cache, offline), workers),
+                  Stage('fetch', _stage(_fetch_step, cancel, pool, limiter, cache, offline), workers)]
+        lookups = (_Lookup(key, bib_entries[key]) for key in pending)
+        for lookup in run_pipeline(lookups, stages, queue_size=2 * workers, cancel=cancel):
+            if lookup.cancelled:
+                continue  # Left for --resume
+            if lookup.error is not None:
+                print(f"Failed to check {lookup.key}: {lookup.error!r}")
+                metrics.count('entries_failed')
+            entry, record = _check_outcome(lookup)  # Off the network path, in this thread
+            metrics.observe('entry', time.perf_counter() - lookup.started)
+            journal_result(lookup.key, entry, record)
+    if cancel is not None and cancel.is_set():
+        print(f"Cancelled; rerun with --resume to continue from {journal_name}")
+        return None
+    records = read_journal_records(journal_name)
+    # Back in file order; an entry without a record (e.g. lost to an unreadable journal line) stays as it was
+    updated_bib_entries = {key: records[key]['entry'] if key in records else bib_entries[key] for key in keys}
+    if ledger is not None:
+        ledger.record((key, bib_entries[key], records[key]['outcome'], records[key]['entry'])
+                      for key in keys if key in records and records[key].get('outcome') in (UPDATED, CONFIRMED, NOT_FOUND, FAILED))
 
     # Combine updated entries and add unchanged ones if keep_unselected is True
     updated_bib = '\n\n'.join(updated_bib_entries.values())
@@ -59,11 +390,13 @@ def batch_check(bib_name, num_entries=60, keep_unselected=True, progress_object=
         if unchanged:
             updated_bib += '\n\n' + '\n\n'.join(unchanged)
 
-    updated_filename = 'updated_' + os.path.basename(bib_name)
     with open(updated_filename, 'w', encoding='utf-8') as f:
         f.write(updated_bib)
+    write_changes(updated_filename + '.changes.json', bib_name, [records[key] for key in keys if key in records])
+    os.remove(journal_name)  # Complete; a later --resume starts afresh
 
     print(f"Updated BibTeX saved as {updated_filename}")
+    return updated_bib
 
 
 if __name__ == '__main__':
@@ -71,6 +404,35 @@ if __name__ == '__main__':
     parser.add_argument('bib_file', nargs='?', default='cleaned_ref.bib', help='The name of the bib file (default: ref.bib)')
     parser.add_argument('--num', type=int, default=60, help='Number of entries to check (default: 60)')
     parser.add_argument('--remove_unselected', action='store_true', help='Remove unselected entries')  # changed code
+    parser.add_argument('--max-pages', type=int, default=50, help='Restart the browser after this many pages (default: 50)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of entries to check concurrently (default: 1)')
+    parser.add_argument('--rate', type=float, default=0.5, help='Maximum page loads per second across all workers (default: 0.5)')
+    parser.add_argument('--lookup-cache', default=DEFAULT_CACHE_PATH, help=f'SQLite file caching IEEE lookups (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-lookup-cache', action='store_true', help='Neither read nor write the lookup cache')
+    parser.add_argument('--offline', action='store_true', help='Only use cached lookups and never access the network')
+    parser.add_argument('--dump-index', metavar='PATH', help='Look entries up in this indexed DBLP/Crossref dump before IEEE (see utils.dumpindex)')
+    parser.add_argument('--crossref', action='store_true',
+                        help='Also take the BibTeX of non-IEEE DOIs from Crossref/DataCite via doi.org')
+    parser.add_argument('--ledger', default=DEFAULT_LEDGER_PATH, help=f'SQLite file recording which entry versions were checked (default: {DEFAULT_LEDGER_PATH})')
+    parser.add_argument('--no-ledger', action='store_true', help='Neither read nor write the verification ledger')
+    parser.add_argument('--only-changed', action='store_true', help='Only check entries added or edited since they were last checked')
+    parser.add_argument('--recheck-after', type=float, metavar='DAYS', help='With --only-changed, also check entries last checked more than DAYS ago')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run, skipping entries it already checked')
+    parser.add_argument('--metrics', metavar='PATH', help='Write per-stage latencies and counters to PATH (.json or .csv)')
+    parser.add_argument('--profile', metavar='PATH', help='Run under cProfile and write the stats to PATH')
     args = parser.parse_args()
+    if args.only_changed and args.no_ledger:
+        parser.error('--only-changed needs the verification ledger')
     keep_unselected = not args.remove_unselected  # changed code
-    batch_check(args.bib_file, args.num, keep_unselected)  # changed code
+    cache = None if args.no_lookup_cache else LookupCache(args.lookup_cache)
+    dump = DumpIndex(args.dump_index) if args.dump_index else None
+    ledger = None if args.no_ledger else VerificationLedger(args.ledger)
+    max_age = args.recheck_after * 24 * 3600 if args.recheck_after is not None else None
+    try:
+        with profiled(args.profile):
+            batch_check(args.bib_file, args.num, keep_unselected, max_pages=args.max_pages, workers=args.workers,
+                        limiter=TokenBucket(args.rate), cache=cache, offline=args.offline, resume=args.resume, dump=dump,
+                        ledger=ledger, only_changed=args.only_changed, max_age=max_age, crossref=args.crossref)  # changed code
+    finally:
+        if args.metrics:  # Also for interrupted runs
+            get_metrics().write(args.metrics)
@@ -1,19 +1,88 @@
 import re
 import argparse
 import os
-from utils.textcolor import remove_textcolor
+import time
+import io
+import json
+from contextlib import ExitStack, redirect_stdout
+from dataclasses import dataclass, field
+from utils.bib import BibEntry, iter_bib_entries, open_bib_buffer, index_bib_entries
+from utils.bibcache import load_bib_index
+from utils.latex import scan_tex, scan_project, scan_tex_file, merge_citations, rewrite_citations
+from utils.textcolor import remove_textcolor, strip_review_markup, REVIEW_COMMANDS
+from utils.metrics import get_metrics, profiled
+
+_COMMENT_LINES = re.compile(r'(?m)^[ \t]*%.*\n?')
+_BLANK_LINES = re.compile(r'\n\s*\n')
+_BLANK_LINES_BYTES = re.compile(rb'\n\s*\n')
+
+@dataclass
+class CleanOptions:
+    """Options of a clean, mirroring the command-line flags."""
+    keep_unused: bool = False
+    wrap_text: bool = False
+    remove_review_textcolor: bool = False
+    review_colors: tuple = ('red',)
+    review_commands: tuple = ('textcolor',)
+    dedupe: str = None  # None, 'report' or 'merge'
+    dedupe_threshold: float = 0.85
+    transforms: tuple = ()  # Field transforms or their names, see utils.transforms
+
+@dataclass
+class CleanResult:
+    """Output of `clean`."""
+    bib: str
+    tex: str
+    citations: list = field(default_factory=list)
+    markup_counts: dict = field(default_factory=dict)
+    duplicates: list = field(default_factory=list)
+    renames: dict = field(default_factory=dict)
+
+def tidy_entry(entry):
+    """Removes comment lines and empty lines from a single BibTeX entry.
+
+    Args:
+        entry (str): A single BibTeX entry.
+
+    Returns:
+        str: The entry without comment or empty lines.
+    """
+    if '%' in entry:
+        entry = _COMMENT_LINES.sub('', entry)
+    return _BLANK_LINES.sub('\n', entry)
 
 def wrap_first_word_in_title(entry):
     """Wraps the first word in the title field of a BibTeX entry with \text{}.
 
     Args:
-        entry (str): A single BibTeX entry.
+        entry (str | BibEntry): A single BibTeX entry. A `BibEntry` is edited in place.
+
+    Returns:
+        str | BibEntry: The modified BibTeX entry, of the same type as `entry`.
+    """
+    bib_entry = BibEntry.from_text(entry) if isinstance(entry, str) else entry
+    title = bib_entry.title
+    if title and not title[0].isspace():
+        from utils.transforms import wrap_title
+
+        bib_entry.set_field('title', wrap_title('title', title))
+    return str(bib_entry) if isinstance(entry, str) else bib_entry
+
+def field_transform(wrap_text, transforms=()):
+    """Combines the field transforms of a clean into one, or None if there are none.
+
+    Args:
+        wrap_text (bool): Whether to wrap the first word in the title (applied first).
+        transforms (iterable, optional): Further transforms, or names of registered ones.
 
     Returns:
-        str: The modified BibTeX entry.
+        function: The transform to pass to `BibEntry.rewrite_fields`.
     """
-    pattern = r'(title\s*=\s*{)(\S+)'
-    return re.sub(pattern, r'\1\\text{\2}', entry, count=1)
+    if not wrap_text and not transforms:
+        return None
+    from utils.transforms import chain  # Only imported when entries are rewritten
+
+    return chain((['wrap-title'] if wrap_text else []) + list(transforms))
 
 def extract_citations(tex):
     """Extracts all citation keys from a LaTeX file.
@@ -24,80 +93,158 @@ def extract_citations(tex):
     Returns:
         list: Ordered list of citation keys without duplicates.
     """
-    tex = re.sub(r'\\citeA\{\}', '', tex)
-    tex = re.sub(r'\\cite\{\}', '', tex)
-
-    raw_citations = re.findall(r'\\cite\{(.+?)\}', tex) + re.findall(r'\\citeA\{(.+?)\}', tex)
     seen = set()
     ordered = []
 
-    for entries in raw_citations:
-        for entry in entries.replace(' ', '').split(','):
-            if entry and entry not in seen:
-                seen.add(entry)
-                ordered.append(entry)
+    for kind, entry, _ in scan_tex(tex):
+        if kind == 'cite' and entry not in seen:
+            seen.add(entry)
+            ordered.append(entry)
     return ordered
 
-def parse_bib_entries(bib):
+def parse_bib_entries(bib, index=None):
     """Parses BibTeX entries into a dictionary.
 
     Args:
-        bib (str): Raw contents of a .bib file.
+        bib (str | bytes): Raw contents of a .bib file.
+        index (dict, optional): Precomputed mapping from citation key to
+            `(start, end, ...)` offsets into `bib` (e.g. from
+            `utils.bibcache.load_bib_index`). When given, `bib` is not tokenized.
 
     Returns:
-        dict: Mapping from citation key to full BibTeX entry.
-    """
-    bib = re.sub(r'(?m)^\s*%.*\n?', '', bib)  # Remove comments
-    bib = re.sub(r'\n\s*\n', '\n', bib)      # Remove empty lines
-    bib_lines = bib.splitlines()
-
-    entries = {}
-    current = []
-    key = None
-    for line in bib_lines:
-        if line.startswith('@'):
-            if key:
-                entries[key] = '\n'.join(current)
-            key = line.split('{')[1].split(',')[0]
-            current = [line]
-        else:
-            current.append(line)
-    if key:
-        entries[key] = '\n'.join(current)
-    return entries
+        dict: Mapping from citation key to `BibEntry`. Entries refer to `bib` and
+        are only sliced and decoded when used.
+    """
+    if index is not None:
+        return {key: BibEntry(key, span[2], bib, span[0], span[1]) for key, span in index.items()}
+    return {key: BibEntry(key, entry_type, bib, start, end) for key, entry_type, start, end in iter_bib_entries(bib) if key}
 
-def write_cleaned_bib(entries, ordered_keys, wrap_text, keep_unused):
+def write_cleaned_bib(entries, ordered_keys, wrap_text, keep_unused, transforms=()):
     """Generates a cleaned BibTeX content.
 
     Args:
-        entries (dict): All parsed BibTeX entries.
+        entries (dict): All parsed BibTeX entries, as `BibEntry` objects or strings.
         ordered_keys (list): Citation keys in order of appearance.
         wrap_text (bool): Whether to wrap the first word in the title.
         keep_unused (bool): Whether to include uncited entries.
+        transforms (iterable, optional): Field transforms, or names of registered ones
+            (see `utils.transforms`), applied to each entry in one pass together with `wrap_text`.
 
     Returns:
         str: Cleaned BibTeX content.
     """
+    transform = field_transform(wrap_text, transforms)
+
+    def render(entry):
+        text = tidy_entry(str(entry))  # Watch mode reuses the parsed entries, so they are not edited
+        return BibEntry.from_text(text).rewrite_fields(transform) if transform else text
+
     cleaned = []
     ref_count = 1
 
     for key in ordered_keys:
         if key in entries:
-            entry = entries.pop(key)
-            if wrap_text:
-                entry = wrap_first_word_in_title(entry)
-            cleaned.append(f'% reference {ref_count}\n' + entry)
+            cleaned.append(f'% reference {ref_count}\n' + render(entries.pop(key)))
             ref_count += 1
 
     if keep_unused:
         for i, entry in enumerate(entries.values(), 1):
-            if wrap_text:
-                entry = wrap_first_word_in_title(entry)
-            cleaned.append(f'% unused {i}\n' + entry)
+            cleaned.append(f'% unused {i}\n' + render(entry))
 
     return '\n\n'.join(cleaned)
 
-def save_cleaned_files(bib_name, tex_name, bib_content, remove_review_textcolor):
+def stream_cleaned_bib(buf, index, ordered_keys, out, wrap_text, keep_unused, transforms=()):
+    """Writes cleaned BibTeX content straight from a mapped .bib buffer.
+
+    Produces the same content as `write_cleaned_bib`, but only the entries that
+    end up in the output are sliced out of `buf`, and they are only decoded when
+    they need to be rewritten.
+
+    Args:
+        buf (mmap.mmap | bytes): Contents of the .bib file.
+        index (dict): Mapping from citation key to `(start, end, ...)` offsets into `buf`.
+        ordered_keys (list): Citation keys in order of appearance.
+        out (BinaryIO): Binary file object to write the cleaned content to.
+        wrap_text (bool): Whether to wrap the first word in the title.
+        keep_unused (bool): Whether to include uncited entries.
+        transforms (iterable, optional): Field transforms, as for `write_cleaned_bib`.
+    """
+    stream_merged_bib([(buf, index)], ordered_keys, out, wrap_text, keep_unused, transforms)
+
+def _same_entry(a, b):
+    return a == b or b' '.join(a.split()) == b' '.join(b.split())
+
+def stream_merged_bib(sources, ordered_keys, out, wrap_text, keep_unused, transforms=()):
+    """Writes cleaned BibTeX content from several mapped .bib files.
+
+    Each cited key is looked up in the indexes of the sources in priority order
+    and streamed from the first one that defines it, so the files are never
+    concatenated and lower-priority files are only touched for the entries
+    they contribute.
+
+    Args:
+        sources (list): `(buf, index)` pairs as for `stream_cleaned_bib`, highest priority first.
+        ordered_keys (list): Citation keys in order of appearance.
+        out (BinaryIO): Binary file object to write the cleaned content to.
+        wrap_text (bool): Whether to wrap the first word in the title.
+        keep_unused (bool): Whether to include uncited entries of all sources.
+        transforms (iterable, optional): Field transforms, as for `write_cleaned_bib`.
+
+    Returns:
+        list: `(key, positions)` for every written key that the sources define
+        differently (ignoring whitespace), with the positions in `sources` of
+        all its definitions, the one written first.
+    """
+    transform = field_transform(wrap_text, transforms)
+    conflicts = []
+
+    def raw(key, position):
+        buf, index = sources[position]
+        span = index[key]
+        return buf[span[0]:span[1]]
+
+    def write(label, key, position):
+        entry = raw(key, position)
+        shadowed = [i for i in range(position + 1, len(sources))
+                    if key in sources[i][1] and not _same_entry(entry, raw(key, i))]
+        if shadowed:
+            conflicts.append((key, [position] + shadowed))
+        if transform or b'%' in entry or _BLANK_LINES_BYTES.search(entry):
+            text = tidy_entry(entry.decode('utf-8'))
+            if transform:
+                text = BibEntry.from_text(text).rewrite_fields(transform)
+            entry = text.encode('utf-8')
+        if out.tell():
+            out.write(b'\n\n')
+        out.write(label.encode() + entry)
+
+    cited = set()
+    for key in ordered_keys:
+        if key in cited:
+            continue
+        position = next((i for i, (_, index) in enumerate(sources) if key in index), None)
+        if position is not None:
+            cited.add(key)
+            write(f'% reference {len(cited)}\n', key, position)
+
+    if keep_unused:
+        unused = 0
+        for position, (_, index) in enumerate(sources):
+            for key in index:
+                if key not in cited:
+                    cited.add(key)  # Shadowed definitions in later sources are not repeated
+                    unused += 1
+                    write(f'% unused {unused}\n', key, position)
+    return conflicts
+
+def report_conflicts(conflicts, bib_names):
+    """Prints the keys that several .bib files define differently, and which definition was used."""
+    for key, positions in conflicts:
+        used, *shadowed = (bib_names[i] for i in positions)
+        print(f"Conflict: {key} is defined differently in {used} (used) and {', '.join(shadowed)}")
+
+def save_cleaned_files(bib_name, tex_name, bib_content, remove_review_textcolor, review_colors=('red',),
+                       review_commands=('textcolor',), out_dir='.'):
     """Saves cleaned bib and tex files, with optional cleanup.
 
     Args:
@@ -105,49 +252,600 @@ def save_cleaned_files(bib_name, tex_name, bib_content, remove_review_textcolor)
         tex_name (str): Original .tex filename.
         bib_content (str): Cleaned bib content.
         remove_review_textcolor (bool): If True, remove color markup.
+        review_colors (iterable, optional): Colors of the markup to remove. Defaults to red.
+        review_commands (iterable, optional): Review commands to strip, see
+            `utils.textcolor.strip_review_markup`. Defaults to `\\textcolor` only.
+        out_dir (str, optional): Directory to write the cleaned files to. Defaults to
+            the current directory.
     """
-    cleaned_bib = 'cleaned_' + os.path.basename(bib_name)
-    cleaned_tex = 'cleaned_' + os.path.basename(tex_name)
+    cleaned_bib = os.path.join(out_dir, 'cleaned_' + os.path.basename(bib_name))
 
+    if remove_review_textcolor:
+        bib_content, _ = strip_review_markup(bib_content, review_colors, review_commands)
     with open(cleaned_bib, 'w') as f:
         f.write(bib_content)
 
+    save_cleaned_tex(None, tex_name, remove_review_textcolor, review_colors, review_commands, out_dir)
+
+def save_cleaned_tex(cleaned_bib, tex_name, remove_review_textcolor, review_colors=('red',),
+                     review_commands=('textcolor',), out_dir='.'):
+    """Saves the cleaned tex file next to an already written cleaned bib file.
+
+    Args:
+        cleaned_bib (str): Path of the cleaned .bib file still to be stripped of
+            markup, or None if it needs no further processing.
+        tex_name (str): Original .tex filename.
+        remove_review_textcolor (bool): If True, remove color markup from both files.
+        review_colors (iterable, optional): Colors of the markup to remove. Defaults to red.
+        review_commands (iterable, optional): Review commands to strip. Defaults to `\\textcolor` only.
+        out_dir (str, optional): Directory to write the cleaned file to. Defaults to
+            the current directory.
+    """
+    cleaned_tex = os.path.join(out_dir, 'cleaned_' + os.path.basename(tex_name))
+
     if remove_review_textcolor:
-        remove_textcolor(cleaned_bib, cleaned_bib)
-        remove_textcolor(tex_name, cleaned_tex)
+        with get_metrics().timer('textcolor'):
+            if cleaned_bib:
+                remove_textcolor(cleaned_bib, cleaned_bib, review_colors, review_commands)
+            remove_textcolor(tex_name, cleaned_tex, review_colors, review_commands)
     else:
         with open(tex_name, 'r', encoding='utf-8') as f:
             tex_content = f.read()
         with open(cleaned_tex, 'w', encoding='utf-8') as f:
             f.write(tex_content)
 
-def main(bib_name, tex_name, keep_unused, wrap_text=False, remove_review_textcolor=False):
+def _file_state(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None  # Missing, e.g. while an editor replaces the file
+    return stat.st_mtime_ns, stat.st_size
+
+def _load_bib(bib_name, use_cache):
+    if use_cache:
+        with open(bib_name, 'rb') as f:
+            bib_raw = f.read()
+        return parse_bib_entries(bib_raw, load_bib_index(bib_name, bib_raw))
+    with open(bib_name, 'r') as f:
+        return parse_bib_entries(f.read())
+
+class WarmCache:
+    """
+    Bibliographies and .tex scans kept in memory between cleans by the daemon.
+
+    Every use checks the size and mtime of the file, so edited files are read
+    again; the least recently used items are evicted beyond the capacities.
+    """
+
+    def __init__(self, max_bibs=8, max_scans=256):
+        from utils.daemon import LRUCache
+
+        self.bibs = LRUCache(max_bibs)
+        self.scans = LRUCache(max_scans)
+
+    def bib(self, bib_name, use_cache=True):
+        """
+        Returns:
+            tuple: `(buf, index)`, the contents of the .bib file and its parse index
+            (see `utils.bibcache.load_bib_index`).
+        """
+        path = os.path.abspath(bib_name)
+        state = _file_state(path)
+        cached = self.bibs.get(path)
+        if cached and cached[0] == state:
+            get_metrics().count('warm_bib_hit')
+            return cached[1], cached[2]
+        get_metrics().count('warm_bib_miss')
+        with open(path, 'rb') as f:
+            buf = f.read()
+        index = load_bib_index(path, buf) if use_cache else index_bib_entries(buf)
+        self.bibs.put(path, (state, buf, index))
+        return buf, index
+
+    def scan_project(self, root_tex):
+        """Same as `utils.latex.scan_project`, rescanning only files that changed."""
+        root = os.path.abspath(root_tex)
+        root_dir = os.path.dirname(root)
+        scans = {}
+        pending = [root]
+        while pending:
+            path = pending.pop()
+            if path in scans:
+                continue
+            state = _file_state(path)
+            cached = self.scans.get((path, root_dir))  # Inclusions resolve relative to the root
+            # A scan is stale once its file changed or one of its missing inclusions was created
+            if cached and cached[0] == state and not any(os.path.isfile(candidate) for candidate in cached[2]):
+                get_metrics().count('warm_scan_hit')
+                scans[path] = cached[1]
+            else:
+                get_metrics().count('warm_scan_miss')
+                missing = {}
+                scans[path] = scan_tex_file(path, root_dir, missing)
+                self.scans.put((path, root_dir), (state, scans[path], list(missing)))
+            pending.extend(value for kind, value, _ in scans[path] if kind == 'include' and value not in scans)
+        ordered, locations = merge_citations(root, scans)
+        return ordered, locations, scans
+
+def clean(bib, tex, options=None, citations=None, index=None):
+    """Cleans a bibliography against a manuscript entirely in memory.
+
+    Args:
+        bib (bytes | str): Contents of the .bib file.
+        tex (bytes | str): Contents of the .tex file.
+        options (CleanOptions, optional): What to clean. Defaults to `CleanOptions()`.
+        citations (list, optional): Citation keys in order of appearance, if already
+            known (e.g. from a multi-file project scan). Extracted from `tex` otherwise.
+        index (dict, optional): Offsets of the entries in `bib`, which must then be
+            bytes (see `parse_bib_entries`).
+
+    Returns:
+        CleanResult: The cleaned .bib and .tex contents, the citation keys used,
+        the number of review markup removals per command and, with `options.dedupe`,
+        the duplicate clusters found and the keys merged away.
+    """
+    options = options or CleanOptions()
+    metrics = get_metrics()
+    if isinstance(tex, bytes):
+        tex = tex.decode('utf-8')
+    if isinstance(bib, bytes) and index is None:
+        bib = bib.decode('utf-8')
+    if citations is None:
+        with metrics.timer('scan'):
+            citations = extract_citations(tex)
+
+    with metrics.timer('parse'):
+        bib_entries = parse_bib_entries(bib, index)
+
+    duplicates, renames = [], {}
+    if options.dedupe:
+        from utils.dedupe import find_duplicates, merge_duplicates
+
+        with metrics.timer('dedupe'):
+            duplicates = find_duplicates(bib_entries, options.dedupe_threshold)
+            if options.dedupe == 'merge':
+                renames = merge_duplicates(bib_entries, duplicates, citations)
+                citations = list(dict.fromkeys(renames.get(key, key) for key in citations))
+                tex, _ = rewrite_citations(tex, renames)
+        metrics.count('duplicates', sum(len(cluster) - 1 for cluster in duplicates))
+
+    with metrics.timer('write'):
+        cleaned_bib = write_cleaned_bib(bib_entries, citations, options.wrap_text, options.keep_unused,
+                                        options.transforms)
+    metrics.count('entries', len(bib_entries))
+    metrics.count('citations', len(citations))
+
+    counts = {}
+    if options.remove_review_textcolor:
+        with metrics.timer('textcolor'):
+            cleaned_bib, counts = strip_review_markup(cleaned_bib, options.review_colors, options.review_commands)
+            tex, tex_counts = strip_review_markup(tex, options.review_colors, options.review_commands)
+        counts = {command: counts[command] + tex_counts[command] for command in counts}
+    return CleanResult(cleaned_bib, tex, citations, counts, duplicates, renames)
+
+def main(bib_name, tex_name, keep_unused, wrap_text=False, remove_review_textcolor=False, use_mmap=False,
+         use_cache=True, review_colors=('red',), review_commands=('textcolor',), out_dir='.', dedupe=None,
+         dedupe_threshold=0.85, transforms=(), merge_bibs=(), warm=None):
     """Main processing function for cleaning BibTeX entries.
 
     Args:
         bib_name (str): Input .bib filename.
-        tex_name (str): Input .tex filename.
+        tex_name (str): Input .tex filename. Files it pulls in with `\\input`,
+            `\\include` or `\\subfile` are scanned for citations as well.
         keep_unused (bool): Whether to retain uncited entries.
         wrap_text (bool, optional): Wrap the first word of the title field. Defaults to False.
         remove_review_textcolor (bool, optional): Clean textcolor markup. Defaults to False.
+        use_mmap (bool, optional): Memory-map the .bib and stream cited entries from it
+            instead of reading it into memory. Defaults to False.
+        use_cache (bool, optional): Reuse the sidecar parse index next to the .bib
+            file, creating it if needed. Defaults to True.
+        review_colors (iterable, optional): Colors of the markup to remove. Defaults to red.
+        review_commands (iterable, optional): Review commands to strip, see
+            `utils.textcolor.REVIEW_COMMANDS`. Defaults to `\\textcolor` only.
+        out_dir (str, optional): Directory to write the cleaned files to. Defaults to
+            the current directory.
+        dedupe (str, optional): `'report'` to list near-duplicate entries, `'merge'` to
+            also keep one entry per cluster and rewrite citations of the others
+            (see `utils.dedupe`). Needs the whole .bib in memory, so `use_mmap` is
+            ignored. Defaults to None.
+        dedupe_threshold (float, optional): Title similarity for near-duplicates. Defaults to 0.85.
+        transforms (iterable, optional): Field transforms applied to every written entry,
+            or names of registered ones (see `utils.transforms`), e.g. `['minify']`.
+        merge_bibs (iterable, optional): Further .bib files, in decreasing priority, to
+            resolve keys from. `bib_name` wins over all of them. The files are memory-mapped
+            and each cited entry is streamed from the first file defining it (see
+            `stream_merged_bib`); keys defined differently in several files are reported.
+            Cannot be combined with `dedupe`.
+        warm (WarmCache, optional): Take the .bib files and .tex scans from this cache
+            instead of reading them. Cited entries are then streamed as with `use_mmap`.
+
+    Time spent per stage (scan, read, parse, write, textcolor, save) is
+    recorded in `utils.metrics.get_metrics()`.
     """
-    with open(bib_name, 'r') as f:
-        bib_raw = f.read()
-    with open(tex_name, 'r') as f:
-        tex_raw = f.read()
+    if merge_bibs and dedupe:
+        raise ValueError("Near-duplicates can only be detected within a single .bib file")
+    metrics = get_metrics()
+    with metrics.timer('scan'):
+        citations, _, scans = warm.scan_project(tex_name) if warm else scan_project(tex_name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    if (use_mmap or merge_bibs or warm) and not dedupe:
+        bib_names = [bib_name, *merge_bibs]
+        cleaned_bib = os.path.join(out_dir, 'cleaned_' + os.path.basename(bib_name))
+        with ExitStack() as stack, open(cleaned_bib, 'wb') as out:
+            sources = []
+            with metrics.timer('parse'):
+                for name in bib_names:
+                    if warm:
+                        sources.append(warm.bib(name, use_cache))
+                        continue
+                    buf = stack.enter_context(open_bib_buffer(name))
+                    sources.append((buf, load_bib_index(name, buf) if use_cache else index_bib_entries(buf)))
+            with metrics.timer('write'):
+                conflicts = stream_merged_bib(sources, citations, out, wrap_text, keep_unused, transforms)
+        metrics.count('entries', sum(len(index) for _, index in sources))
+        metrics.count('citations', len(citations))
+        if conflicts:
+            metrics.count('conflicts', len(conflicts))
+            report_conflicts(conflicts, bib_names)
+        save_cleaned_tex(cleaned_bib, tex_name, remove_review_textcolor, review_colors, review_commands, out_dir)
+        return
+
+    with metrics.timer('read'):
+        if warm:
+            bib_raw, index = warm.bib(bib_name, use_cache)
+        else:
+            with open(bib_name, 'rb') as f:
+                bib_raw = f.read()
+        with open(tex_name, 'rb') as f:
+            tex_raw = f.read()
+
+    options = CleanOptions(keep_unused, wrap_text, remove_review_textcolor, review_colors, review_commands,
+                           dedupe, dedupe_threshold, tuple(transforms))
+    if not warm:
+        with metrics.timer('index'):
+            index = load_bib_index(bib_name, bib_raw) if use_cache else None
+    result = clean(bib_raw, tex_raw, options, citations, index)
+
+    with metrics.timer('save'):
+        for name, content in ((bib_name, result.bib), (tex_name, result.tex)):
+            with open(os.path.join(out_dir, 'cleaned_' + os.path.basename(name)), 'w', encoding='utf-8') as f:
+                f.write(content)
+    if remove_review_textcolor:
+        print(f"Removed review markup: {result.markup_counts}")
+    for cluster in result.duplicates:
+        kept = next((key for key in cluster if key not in result.renames), None)
+        print("Duplicates: " + ', '.join(f"{key} (kept)" if key == kept and result.renames else key for key in cluster))
+    if result.renames:
+        root = os.path.abspath(tex_name)
+        for path, events in scans.items():
+            renamed = sorted({value for kind, value, _ in events if kind == 'cite' and value in result.renames})
+            if path != root and renamed:
+                print(f"Warning: {path} cites merged keys {', '.join(renamed)}; only {tex_name} is rewritten")
+
+def watch(bib_name, tex_name, keep_unused, wrap_text=False, remove_review_textcolor=False, use_cache=True,
+          interval=1.0, review_colors=('red',), review_commands=('textcolor',), out_dir='.', transforms=()):
+    """Keeps the cleaned files up to date while the inputs are being edited.
+
+    Parsed bib entries and per-file citation scans stay in memory. When a file
+    changes only that file is parsed or scanned again, and the cleaned .bib is
+    only rewritten if the ordered citation keys or one of the entries that end
+    up in it changed. Included files that do not exist yet are watched too, and
+    the files including them are scanned again once they are created. Runs until
+    interrupted with Ctrl+C.
+
+    Args:
+        bib_name (str): Input .bib filename.
+        tex_name (str): Input root .tex filename.
+        keep_unused (bool): Whether to retain uncited entries.
+        wrap_text (bool, optional): Wrap the first word of the title field. Defaults to False.
+        remove_review_textcolor (bool, optional): Clean textcolor markup. Defaults to False.
+        use_cache (bool, optional): Reuse the sidecar parse index of the .bib file. Defaults to True.
+        interval (float, optional): Seconds between polls for changes. Defaults to 1.0.
+        review_colors (iterable, optional): Colors of the markup to remove. Defaults to red.
+        review_commands (iterable, optional): Review commands to strip. Defaults to `\\textcolor` only.
+        out_dir (str, optional): Directory to write the cleaned files to. Defaults to
+            the current directory.
+        transforms (iterable, optional): Field transforms, as for `main`.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    root = os.path.abspath(tex_name)
+    root_dir = os.path.dirname(root)
+    missing = {}  # Paths of included files that do not exist yet -> files including them
+    citations, _, scans = scan_project(tex_name, missing=missing)
+    bib_entries = _load_bib(bib_name, use_cache)
+    states = {path: _file_state(path) for path in scans.keys() | missing.keys()}
+    states[bib_name] = _file_state(bib_name)
+
+    def rewrite():
+        with get_metrics().timer('rewrite'):
+            cleaned_bib = write_cleaned_bib(dict(bib_entries), citations, wrap_text, keep_unused, transforms)
+            save_cleaned_files(bib_name, tex_name, cleaned_bib, remove_review_textcolor, review_colors,
+                               review_commands, out_dir)
+        print(f"Wrote cleaned_{os.path.basename(bib_name)} ({len(citations)} citations)")
+
+    rewrite()
+    print(f"Watching {bib_name} and {len(scans)} .tex file(s) for changes. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(interval)
+            changed = [path for path in states if _file_state(path) not in (None, states[path])]
+            if not changed:
+                continue
+
+            affected = set()
+            tex_changed = False
+            for path in changed:
+                states[path] = _file_state(path)
+                if path == bib_name:
+                    new_entries = _load_bib(bib_name, use_cache)
+                    affected.update(key for key in bib_entries.keys() | new_entries.keys()
+                                    if bib_entries.get(key) != new_entries.get(key))
+                    bib_entries = new_entries
+                    continue
+                tex_changed = tex_changed or path == root
+                # A created inclusion is picked up by scanning the files including it
+                pending = sorted(missing.pop(path)) if path in missing and path not in scans else [path]
+                while pending:  # Rescan the file and any newly included ones
+                    current = pending.pop()
+                    scans[current] = scan_tex_file(current, root_dir, missing)
+                    states.setdefault(current, _file_state(current))
+                    pending.extend(value for kind, value, _ in scans[current]
+                                   if kind == 'include' and value not in scans)
+                for candidate in missing:
+                    states.setdefault(candidate, _file_state(candidate))
+
+            new_citations, _ = merge_citations(root, scans)
+            if not keep_unused:
+                affected &= set(new_citations)
+            if new_citations != citations or affected:
+                citations = new_citations
+                rewrite()
+            elif tex_changed:
+                save_cleaned_tex(None, tex_name, remove_review_textcolor, review_colors, review_commands, out_dir)
+                print(f"Wrote cleaned_{os.path.basename(tex_name)}")
+    except KeyboardInterrupt:
+        print("Stopped watching.")
 
-    citations = extract_citations(tex_raw)
-    bib_entries = parse_bib_entries(bib_raw)
-    cleaned_bib = write_cleaned_bib(bib_entries, citations, wrap_text, keep_unused)
-    save_cleaned_files(bib_name, tex_name, cleaned_bib, remove_review_textcolor)
+_batch_indexes = {}
+
+def _init_batch_worker(indexes):
+    global _batch_indexes
+    _batch_indexes = indexes
+
+def _clean_project(project):
+    """Cleans one manifest project in a worker, using the bib indexes built by the parent."""
+    bib_names, tex_name, out_dir = _bib_names(project), project['tex'], project['out']
+    remove_review = project.get('remove_review_textcolor', False) or project.get('remove_review_markup', False)
+    review_colors = project.get('review_colors', ['red'])
+    review_commands = REVIEW_COMMANDS if project.get('remove_review_markup', False) else ('textcolor',)
+
+    os.makedirs(out_dir, exist_ok=True)
+    citations, _, _ = scan_project(tex_name)
+    cleaned_bib = os.path.join(out_dir, 'cleaned_' + os.path.basename(bib_names[0]))
+    with ExitStack() as stack, open(cleaned_bib, 'wb') as out:
+        sources = [(stack.enter_context(open_bib_buffer(name)), _batch_indexes[name]) for name in bib_names]
+        conflicts = stream_merged_bib(sources, citations, out, project.get('wrap_text', False),
+                                      project.get('keep', False), project.get('transforms', ()))
+    report_conflicts(conflicts, bib_names)
+    save_cleaned_tex(cleaned_bib, tex_name, remove_review, review_colors, review_commands, out_dir)
+    return out_dir, len(citations)
+
+def _bib_names(project):
+    return project['bib'] if isinstance(project['bib'], list) else [project['bib']]
+
+def load_manifest(manifest_name):
+    """Reads a batch manifest.
+
+    The manifest is a JSON list of projects such as
+    `{"bib": "ref.bib", "tex": "paper1/main.tex", "out": "build/paper1", "keep": true}`.
+    `bib` and `tex` are required; `bib` may also be a list of .bib files in
+    priority order, which are merged as by `main`'s `merge_bibs`. `out`
+    defaults to the directory of `tex`, and `keep`, `wrap_text`, `remove_review_textcolor`, `remove_review_markup`,
+    `review_colors` and `transforms` (a list of transform names) mirror the
+    command-line options. Relative paths are taken
+    relative to the manifest.
+
+    Args:
+        manifest_name (str): Path of the manifest file.
+
+    Returns:
+        list: Project dictionaries with absolute `bib` (a path or list of paths), `tex` and `out` paths.
+    """
+    with open(manifest_name, 'r', encoding='utf-8') as f:
+        projects = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(manifest_name))
+    resolved = []
+    for project in projects:
+        project = dict(project)
+        for name in ('bib', 'tex'):
+            if name not in project:
+                raise ValueError(f"Manifest project {project} is missing '{name}'")
+            if name == 'bib' and isinstance(project[name], list):
+                project[name] = [os.path.join(base, path) for path in project[name]]
+            else:
+                project[name] = os.path.join(base, project[name])
+        project['out'] = os.path.join(base, project['out']) if 'out' in project else os.path.dirname(project['tex'])
+        resolved.append(project)
+    return resolved
+
+def clean_batch(manifest_name, jobs=None, use_cache=True):
+    """Cleans every project listed in a manifest on a process pool.
+
+    Each distinct .bib file is indexed only once, in the parent process; the
+    workers memory-map it and stream their cited entries from it, so projects
+    sharing a master bibliography do not parse it again.
+
+    Args:
+        manifest_name (str): Path of the manifest file, see `load_manifest`.
+        jobs (int, optional): Number of worker processes. Defaults to the CPU count.
+        use_cache (bool, optional): Reuse the sidecar parse index of each .bib file. Defaults to True.
+
+    Returns:
+        list: `(out_dir, number_of_citations)` per project, in manifest order.
+    """
+    from concurrent.futures import ProcessPoolExecutor  # Only batch mode pays for multiprocessing
+
+    projects = load_manifest(manifest_name)
+
+    indexes = {}
+    for bib_name in dict.fromkeys(name for project in projects for name in _bib_names(project)):
+        with open_bib_buffer(bib_name) as buf, get_metrics().timer('index'):
+            indexes[bib_name] = load_bib_index(bib_name, buf) if use_cache else index_bib_entries(buf)
+
+    with ProcessPoolExecutor(jobs, initializer=_init_batch_worker, initargs=(indexes,)) as executor:
+        results = list(executor.map(_clean_project, projects))
+
+    for out_dir, count in results:
+        print(f"Cleaned {out_dir} ({count} citations)")
+    return results
+
+def parse_transforms(names='', minify=False, dropped=''):
+    """Builds the transforms selected by `--transform`, `--minify` and `--drop-fields`.
+
+    Args:
+        names (str, optional): Comma-separated names of registered transforms.
+        minify (bool, optional): Append the `minify` transform. Defaults to False.
+        dropped (str, optional): Comma-separated names of further fields to drop.
+
+    Returns:
+        list: Transform names and functions, for `main`'s `transforms`.
+
+    Raises:
+        ValueError: If a name is not a registered transform.
+    """
+    from utils.transforms import drop_fields, transform_names
+
+    transforms = [name.strip() for name in names.split(',') if name.strip()]
+    unknown = [name for name in transforms if name not in transform_names()]
+    if unknown:
+        raise ValueError(f"unknown transform(s) {', '.join(unknown)}; choose from {', '.join(transform_names())}")
+    if minify:
+        transforms.append('minify')
+    dropped = [name.strip() for name in dropped.split(',') if name.strip()]
+    if dropped:
+        transforms.append(drop_fields(*dropped))
+    return transforms
+
+def clean_request(request, warm=None):
+    """Runs one clean requested from the daemon (see `serve`) or `cleaner_client.py`.
+
+    Args:
+        request (dict): The command-line options of the cleaner under their argparse
+            names, e.g. `{"bib_file": ..., "tex_file": ..., "keep": true, "transform": "minify"}`.
+            Paths must be absolute, since the daemon runs in a directory of its own.
+            An empty request only checks that the daemon is running.
+        warm (WarmCache, optional): Cache of bibliographies and scans to use.
+
+    Returns:
+        dict: `{"ok": true, "output": ..., "elapsed": ...}` with everything the clean
+        printed and its duration in seconds.
+    """
+    if not request:
+        return {'ok': True}
+    metrics = get_metrics()
+    metrics.reset()  # Only this clean is reported, and a long-running daemon does not pile up samples
+    start = time.perf_counter()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        review_commands = REVIEW_COMMANDS if request.get('remove_review_markup') else ('textcolor',)
+        main(request['bib_file'], request['tex_file'], request.get('keep', False), request.get('wrap_text', False),
+             request.get('remove_review_textcolor', False) or request.get('remove_review_markup', False),
+             request.get('mmap', False), not request.get('no_cache', False),
+             [color.strip() for color in request.get('review_colors', 'red').split(',') if color.strip()],
+             review_commands, request.get('out_dir', '.'), request.get('dedupe'), request.get('dedupe_threshold', 0.85),
+             parse_transforms(request.get('transform', ''), request.get('minify', False), request.get('drop_fields', '')),
+             request.get('merge_bib', []), warm)
+        if request.get('metrics'):
+            metrics.write(request['metrics'])
+    return {'ok': True, 'output': output.getvalue(), 'elapsed': time.perf_counter() - start}
+
+def serve(socket_path=None, port=None, max_bibs=8, max_scans=256):
+    """Runs the cleaner as a daemon that answers `clean_request`s until interrupted.
+
+    Parsed bibliographies and .tex scans stay in memory between requests (see
+    `WarmCache`), so a clean of unchanged files skips interpreter startup,
+    imports and parsing, and only writes the output.
+
+    Args:
+        socket_path (str, optional): Unix socket to listen on. Defaults to
+            `utils.daemon.DEFAULT_SOCKET_PATH`.
+        port (int, optional): Serve HTTP on this localhost port instead.
+        max_bibs (int, optional): Number of bibliographies kept in memory. Defaults to 8.
+        max_scans (int, optional): Number of scanned .tex files kept in memory. Defaults to 256.
+    """
+    from utils.daemon import serve_requests
+
+    warm = WarmCache(max_bibs, max_scans)
+    serve_requests(lambda request: clean_request(request, warm), socket_path, port)
 
 if __name__ == '__main__':
+    from utils.transforms import transform_names
+
     parser = argparse.ArgumentParser(description='Clean and reorder bib entries based on citations in the tex file.')
     parser.add_argument('bib_file', nargs='?', default='ref.bib', help='BibTeX file name (default: ref.bib)')
     parser.add_argument('tex_file', nargs='?', default='main.tex', help='TeX file name (default: main.tex)')
     parser.add_argument('--keep', action='store_true', help='Keep uncited entries in the cleaned .bib file')
     parser.add_argument('--wrap-text', action='store_true', help='Wrap first word in title with \\text{}')
     parser.add_argument('--remove-review-textcolor', action='store_true', help='Remove textcolor markup from files')
+    parser.add_argument('--mmap', action='store_true', help='Memory-map the .bib file instead of reading it into memory')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the sidecar parse index of the .bib file')
+    parser.add_argument('--watch', action='store_true', help='Stay running and re-clean whenever the .bib or .tex files change')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between checks for changes in watch mode (default: 1.0)')
+    parser.add_argument('--review-colors', default='red', help='Comma-separated colors of the markup to remove (default: red)')
+    parser.add_argument('--remove-review-markup', action='store_true',
+                        help='Also remove \\hl, \\added, \\deleted, \\replaced and \\color review markup (implies --remove-review-textcolor)')
+    parser.add_argument('--merge-bib', action='append', default=[], metavar='BIB_FILE',
+                        help='Also resolve keys from this .bib file, after bib_file and earlier --merge-bib files (repeatable)')
+    parser.add_argument('--out-dir', default='.', help='Directory for the cleaned files (default: current directory)')
+    parser.add_argument('--batch', metavar='MANIFEST', help='Clean every project listed in a JSON manifest instead')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes in batch mode (default: CPU count)')
+    parser.add_argument('--dedupe', choices=('report', 'merge'),
+                        help='Report near-duplicate entries, or merge them and rewrite the citations of merged keys')
+    parser.add_argument('--dedupe-threshold', type=float, default=0.85,
+                        help='Title word similarity at which entries by the same first author and year are duplicates (default: 0.85)')
+    parser.add_argument('--transform', default='',
+                        help=f'Comma-separated field transforms to apply to every entry ({", ".join(transform_names())})')
+    parser.add_argument('--minify', action='store_true', help='Drop abstract, keywords, file, note and other fields styles do not print')
+    parser.add_argument('--drop-fields', default='', help='Comma-separated fields to drop from every entry')
+    parser.add_argument('--metrics', metavar='PATH', help='Write per-stage timings and counters to PATH (.json or .csv)')
+    parser.add_argument('--profile', metavar='PATH', help='Run under cProfile and write the stats to PATH')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run as a daemon answering cleaner_client.py requests, keeping bibliographies and scans in memory')
+    parser.add_argument('--socket', metavar='PATH', help='Unix socket of the daemon (default: ~/.cache/bibtex-clean-tool/cleaner.sock)')
+    parser.add_argument('--port', type=int, help='Serve HTTP on this localhost port instead of a Unix socket')
+    parser.add_argument('--max-bibs', type=int, default=8, help='Bibliographies the daemon keeps in memory (default: 8)')
+    parser.add_argument('--max-scans', type=int, default=256, help='Scanned .tex files the daemon keeps in memory (default: 256)')
 
     args = parser.parse_args()
-    main(args.bib_file, args.tex_file, args.keep, args.wrap_text, args.remove_review_textcolor)
+    review_colors = [color.strip() for color in args.review_colors.split(',') if color.strip()]
+    review_commands = REVIEW_COMMANDS if args.remove_review_markup else ('textcolor',)
+    remove_review = args.remove_review_textcolor or args.remove_review_markup
+    if args.dedupe and (args.batch or args.watch):
+        parser.error('--dedupe cannot be combined with --batch or --watch')
+    if args.merge_bib and (args.batch or args.watch or args.dedupe):
+        parser.error('--merge-bib cannot be combined with --batch, --watch or --dedupe')
+    try:
+        transforms = parse_transforms(args.transform, args.minify, args.drop_fields)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        with profiled(args.profile):
+            if args.serve:
+                try:
+                    serve(args.socket, args.port, args.max_bibs, args.max_scans)
+                except OSError as e:  # Socket in use, or port taken
+                    parser.error(str(e))
+            elif args.batch:
+                clean_batch(args.batch, args.jobs, not args.no_cache)
+            elif args.watch:
+                watch(args.bib_file, args.tex_file, args.keep, args.wrap_text, remove_review,
+                      not args.no_cache, args.interval, review_colors, review_commands, args.out_dir, transforms)
+            else:
+                main(args.bib_file, args.tex_file, args.keep, args.wrap_text, remove_review, args.mmap,
+                     not args.no_cache, review_colors, review_commands, args.out_dir, args.dedupe,
+                     args.dedupe_threshold, transforms, args.merge_bib)
+    finally:
+        if args.metrics:  # Also after Ctrl+C ends watch mode
+            get_metrics().write(args.metrics)
@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+
+from utils.daemon import send_request
+
+# Deliberately does not import the cleaner: the point of the daemon is that a clean
+# costs little more than interpreter startup and one request.
+PATH_ARGUMENTS = ('bib_file', 'tex_file', 'out_dir', 'metrics')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Clean a bibliography through a running `cleaner.py --serve` daemon. Takes the same options as cleaner.py.')
+    parser.add_argument('bib_file', nargs='?', default='ref.bib', help='BibTeX file name (default: ref.bib)')
+    parser.add_argument('tex_file', nargs='?', default='main.tex', help='TeX file name (default: main.tex)')
+    parser.add_argument('--keep', action='store_true', help='Keep uncited entries in the cleaned .bib file')
+    parser.add_argument('--wrap-text', action='store_true', help='Wrap first word in title with \\text{}')
+    parser.add_argument('--remove-review-textcolor', action='store_true', help='Remove textcolor markup from files')
+    parser.add_argument('--mmap', action='store_true', help='Accepted for compatibility; the daemon keeps bibliographies in memory')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the sidecar parse index of the .bib file')
+    parser.add_argument('--review-colors', default='red', help='Comma-separated colors of the markup to remove (default: red)')
+    parser.add_argument('--remove-review-markup', action='store_true',
+                        help='Also remove \\hl, \\added, \\deleted, \\replaced and \\color review markup (implies --remove-review-textcolor)')
+    parser.add_argument('--merge-bib', action='append', default=[], metavar='BIB_FILE',
+                        help='Also resolve keys from this .bib file, after bib_file and earlier --merge-bib files (repeatable)')
+    parser.add_argument('--out-dir', default='.', help='Directory for the cleaned files (default: current directory)')
+    parser.add_argument('--dedupe', choices=('report', 'merge'),
+                        help='Report near-duplicate entries, or merge them and rewrite the citations of merged keys')
+    parser.add_argument('--dedupe-threshold', type=float, default=0.85,
+                        help='Title word similarity at which entries by the same first author and year are duplicates (default: 0.85)')
+    parser.add_argument('--transform', default='', help='Comma-separated field transforms to apply to every entry')
+    parser.add_argument('--minify', action='store_true', help='Drop abstract, keywords, file, note and other fields styles do not print')
+    parser.add_argument('--drop-fields', default='', help='Comma-separated fields to drop from every entry')
+    parser.add_argument('--metrics', metavar='PATH', help='Write per-stage timings and counters of this clean to PATH (.json or .csv)')
+    parser.add_argument('--socket', metavar='PATH', help='Unix socket of the daemon (default: ~/.cache/bibtex-clean-tool/cleaner.sock)')
+    parser.add_argument('--port', type=int, help='Connect to the daemon over HTTP on this localhost port instead')
+
+    args = parser.parse_args()
+    request = {name: value for name, value in vars(args).items() if name not in ('socket', 'port')}
+    for name in PATH_ARGUMENTS:
+        if request[name]:
+            request[name] = os.path.abspath(request[name])
+    request['merge_bib'] = [os.path.abspath(name) for name in request['merge_bib']]
+
+    try:
+        response = send_request(request, args.socket, args.port)
+    except OSError:
+        # No daemon running: clean in this process, so build hooks keep working.
+        print("No cleaner daemon is running (start one with `python cleaner.py --serve`); cleaning in-process.",
+              file=sys.stderr)
+        from cleaner import clean_request
+
+        try:
+            response = clean_request(request)
+        except Exception as e:
+            response = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+
+    if not response.get('ok'):
+        sys.exit(f"Error: {response.get('error')}")
+    sys.stdout.write(response['output'])
@@ -1,37 +1,424 @@
+import mmap
+import os
 import re
+from contextlib import contextmanager
 
 
-def parse_bib_file(bib_name):
+# Entry headers may be indented and may use either `{` or `(` as delimiter.
+_ENTRY_HEAD = r'@[ \t]*([A-Za-z]\w*)[ \t\r\n]*([{(])'
+_ENTRY_HEAD_STR = re.compile(_ENTRY_HEAD)
+_ENTRY_HEAD_BYTES = re.compile(_ENTRY_HEAD.encode())
+_NEXT_HEAD_STR = re.compile(r'(?m)^[ \t]*' + _ENTRY_HEAD)
+_NEXT_HEAD_BYTES = re.compile((r'(?m)^[ \t]*' + _ENTRY_HEAD).encode())
+# Between entries only `@` (a new entry) and `%` (a comment line) are significant.
+_TOPLEVEL_STR = re.compile(r'[@%]')
+_TOPLEVEL_BYTES = re.compile(rb'[@%]')
+_BRACES_STR = re.compile(r'[{}]')
+_BRACES_BYTES = re.compile(rb'[{}]')
+_PAREN_BRACES_STR = re.compile(r'[{})]')
+_PAREN_BRACES_BYTES = re.compile(rb'[{})]')
+
+
+def _balanced_group(depth):
+    """Builds an unrolled pattern matching a brace group nested up to `depth` levels."""
+    pattern = r'\{[^{}]*\}'
+    for _ in range(depth - 1):
+        pattern = r'\{[^{}]*(?:' + pattern + r'[^{}]*)*\}'
+    return pattern
+
+
+# Matching a whole entry body inside the regex engine is much faster than
+# counting braces in Python; deeper or unbalanced entries fall back to counting.
+_GROUP_STR = re.compile(_balanced_group(8))
+_GROUP_BYTES = re.compile(_balanced_group(8).encode())
+
+# Entry types that carry no citation key.
+_KEYLESS_TYPES = {'string', 'preamble'}
+
+
+def iter_bib_entries(buf, pos=0):
+    """Scans a BibTeX buffer once and yields entries as they are found.
+
+    The scanner tracks brace depth, so entries may be indented, may span any
+    number of lines and may contain `@` inside field values. Lines starting
+    with `%` between entries and `@comment` blocks are skipped.
+
+    Args:
+        buf (str | bytes | mmap.mmap): Contents of a .bib file.
+        pos (int, optional): Offset to start scanning from. Defaults to 0.
+
+    Yields:
+        tuple: `(key, entry_type, start, end)`, where `buf[start:end]` is the raw
+        entry text. `key` is None for `@string` and `@preamble` entries, and
+        both `key` and `entry_type` are always `str`.
+    """
+    if isinstance(buf, str):
+        toplevel, head, group = _TOPLEVEL_STR, _ENTRY_HEAD_STR, _GROUP_STR
+        braces, paren_braces = _BRACES_STR, _PAREN_BRACES_STR
+        newline, comma = '\n', ','
+    else:
+        toplevel, head, group = _TOPLEVEL_BYTES, _ENTRY_HEAD_BYTES, _GROUP_BYTES
+        braces, paren_braces = _BRACES_BYTES, _PAREN_BRACES_BYTES
+        newline, comma = b'\n', b','
+
+    size = len(buf)
+    while pos < size:
+        match = toplevel.search(buf, pos)
+        if not match:
+            return
+        start = match.start()
+        if buf[start:start + 1] in ('%', b'%'):
+            end_of_line = buf.find(newline, start)
+            pos = size if end_of_line < 0 else end_of_line + 1
+            continue
+
+        header = head.match(buf, start)
+        if not header:
+            pos = start + 1  # A stray `@`, e.g. in free text between entries
+            continue
+
+        entry_type = header.group(1)
+        if not isinstance(entry_type, str):
+            entry_type = entry_type.decode('ascii')
+        entry_type = entry_type.lower()
+        body = header.end()
+        braced = header.group(2) in ('{', b'{')
+        whole = group.match(buf, body - 1) if braced else None
+        if whole:
+            end = whole.end()
+        else:
+            end = _find_entry_end(buf, body, braces if braced else paren_braces)
+        pos = end
+
+        if entry_type == 'comment':
+            continue
+
+        key = None
+        if entry_type not in _KEYLESS_TYPES:
+            stop = buf.find(comma, body, end)
+            key = buf[body:end - 1 if stop < 0 else stop].strip()
+            if not isinstance(key, str):
+                key = key.decode('utf-8', errors='replace')
+        yield key, entry_type, start, end
+
+
+def _find_entry_end(buf, body, closing):
+    """Counts braces from `body` to find where an entry ends.
+
+    Args:
+        buf (str | bytes | mmap.mmap): Contents of a .bib file.
+        body (int): Offset just after the opening delimiter of the entry.
+        closing (re.Pattern): Pattern matching the delimiters to track.
+
+    Returns:
+        int: Offset just after the closing delimiter, or `len(buf)` if the entry
+        is never closed.
+    """
+    depth = 1
+    for token in closing.finditer(buf, body):
+        char = token.group()
+        if char in ('{', b'{'):
+            depth += 1
+        elif char in ('}', b'}'):
+            depth -= 1
+            if depth == 0:
+                return token.end()
+        elif depth == 1:  # `)` closing a parenthesised entry
+            return token.end()
+    # Unterminated entry: stop at the next entry header instead of swallowing the rest of the file.
+    following = (_NEXT_HEAD_STR if isinstance(buf, str) else _NEXT_HEAD_BYTES).search(buf, body)
+    return following.start() if following else len(buf)
+
+
+def parse_bib_file(bib_name, use_cache=True):
     """Parses a .bib file and returns a dictionary of entries.
 
     Args:
         bib_name (str): The name of the .bib file.
+        use_cache (bool, optional): Locate entries through the persistent sidecar
+            index (see `utils.bibcache`) instead of tokenizing. Defaults to True.
 
     Returns:
         dict: A dictionary where keys are entry keys and values are BibTeX entries.
     """
+    if use_cache:
+        from utils.bibcache import load_bib_index
+        with open(bib_name, 'rb') as f:
+            bib = f.read()
+        index = load_bib_index(bib_name, bib)
+        return {key: bib[span[0]:span[1]].decode('utf-8') for key, span in index.items()}
+
     with open(bib_name, 'r', encoding='utf-8') as f:
         bib = f.read()
 
-    bib_entries = {}
-    current_entry = []
-    current_key = None
-
-    for line in bib.splitlines():
-        if line.startswith('%'):
-            continue  # Skip comment lines
-        if line.startswith('@'):
-            if current_key:
-                bib_entries[current_key] = '\n'.join(current_entry)
-            current_key = line.split('{')[1].split(',')[0]
-            current_entry = [line]
-        else:
-            current_entry.append(line)
+    return {key: bib[start:end] for key, _, start, end in iter_bib_entries(bib) if key}
+
+
+@contextmanager
+def open_bib_buffer(bib_name):
+    """Memory-maps a .bib file for read-only, zero-copy access.
+
+    Args:
+        bib_name (str): The name of the .bib file.
+
+    Yields:
+        mmap.mmap | bytes: The mapped file, or `b''` for an empty file.
+    """
+    with open(bib_name, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''  # Empty files cannot be mapped
+            return
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield buf
+        finally:
+            buf.close()
+
+
+def index_bib_entries(buf):
+    """Indexes entries by key without copying or decoding their text.
+
+    Args:
+        buf (str | bytes | mmap.mmap): Contents of a .bib file.
+
+    Returns:
+        dict: Mapping from citation key to `(start, end, entry_type)`, with offsets
+        into `buf`. Later duplicates keep the position of the first definition but
+        point at the last one, like `parse_bib_file`.
+    """
+    return {key: (start, end, entry_type) for key, entry_type, start, end in iter_bib_entries(buf) if key}
+
+
+_KEY = re.compile(r'\s*([^,\s](?:[^,]*[^,\s])?)')
+_FIELD_NAME = re.compile(r'[\s,]*([A-Za-z_][\w:.+/-]*)\s*=\s*')
+_BARE_VALUE = re.compile(r'[^\s,#{}()"]+')
+_QUOTED_END = re.compile(r'[{}"]')
+_CONCAT = re.compile(r'\s*#\s*')
+
+
+def _value_end(text, pos):
+    """Finds the end of one piece of a field value starting at `pos`.
 
-    if current_key:
-        bib_entries[current_key] = '\n'.join(current_entry)
+    Returns:
+        tuple: `(content_start, content_end, end)`, the value without its
+        delimiters and the offset just after it, or None if there is no value.
+    """
+    char = text[pos:pos + 1]
+    if char == '{':
+        group = _GROUP_STR.match(text, pos)
+        end = group.end() if group else _find_entry_end(text, pos + 1, _BRACES_STR)
+        return pos + 1, end - 1, end
+    if char == '"':
+        depth = 0
+        for token in _QUOTED_END.finditer(text, pos + 1):
+            if token.group() == '{':
+                depth += 1
+            elif token.group() == '}':
+                depth -= 1
+            elif depth <= 0:
+                return pos + 1, token.start(), token.end()
+        return pos + 1, len(text), len(text)
+    bare = _BARE_VALUE.match(text, pos)
+    return (pos, bare.end(), bare.end()) if bare else None
+
+
+def _next_field(text, pos):
+    """Locates the next field of an entry, tracking braces and quotes.
+
+    Args:
+        text (str): Entry text.
+        pos (int): Offset after the citation key or the previous field.
+
+    Returns:
+        tuple: `(name, start, end, next_pos)` with the lowercase field name and
+        the offsets of its value without delimiters (values concatenated with
+        `#` span all parts), or None after the last field.
+    """
+    name = _FIELD_NAME.match(text, pos)
+    if not name:
+        return None
+    piece = _value_end(text, name.end())
+    if not piece:
+        return None
+    start, end, pos = piece
+    concat = _CONCAT.match(text, pos)
+    while concat and (piece := _value_end(text, concat.end())):
+        start, end, pos = name.end(), piece[2], piece[2]  # Keep the raw concatenation
+        concat = _CONCAT.match(text, pos)
+    return name.group(1).lower(), start, end, pos
+
+
+class BibEntry:
+    """
+    A single BibTeX entry, referring to its place in the source buffer.
+
+    Nothing is copied or decoded up front: the text is sliced out of the
+    buffer on first access, and fields are located on lookup, scanning only
+    as far as the requested field and remembering everything scanned. Edits
+    such as `set_field` and `set_key` splice the text at the recorded offsets
+    instead of searching it again.
+    """
+
+    __slots__ = ('key', 'entry_type', '_buf', '_start', '_end', '_text', '_fields', '_key_span', '_scan_pos')
+
+    def __init__(self, key, entry_type, buf, start=0, end=None):
+        self.key = key
+        self.entry_type = entry_type
+        self._buf = buf
+        self._start = start
+        self._end = len(buf) if end is None else end
+        self._text = None
+        self._fields = None
+        self._key_span = None
+        self._scan_pos = None  # Where scanning for fields continues; None once all are known
+
+    @classmethod
+    def from_text(cls, text):
+        """
+        Wraps the text of a single entry, e.g. BibTeX fetched by the checker.
+        """
+        header = _ENTRY_HEAD_STR.search(text)
+        entry = cls(None, header.group(1).lower() if header else None, text)
+        entry._parse_header()
+        if entry._key_span:
+            entry.key = text[entry._key_span[0]:entry._key_span[1]]
+        return entry
+
+    @property
+    def text(self):
+        if self._text is None:
+            text = self._buf[self._start:self._end]
+            self._text = text if isinstance(text, str) else text.decode('utf-8')
+            self._buf = None  # No longer needed once decoded
+        return self._text
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f'BibEntry({self.key!r}, {self.entry_type!r})'
+
+    def __eq__(self, other):
+        return isinstance(other, BibEntry) and self.text == other.text
+
+    __hash__ = None
+
+    def _parse_header(self):
+        if self._fields is None:
+            text = self.text
+            header = _ENTRY_HEAD_STR.search(text)
+            self._scan_pos = 0  # Without a header, the text is taken as a bare list of fields
+            if header:
+                stop = text.find(',', header.end())
+                self._scan_pos = len(text) - 1 if stop < 0 else stop
+                key = _KEY.match(text, header.end(), self._scan_pos)
+                self._key_span = key.span(1) if key else None
+            self._fields = {}
+
+    def _span(self, name):
+        """Offsets of a field's value, scanning further into the entry if needed."""
+        self._parse_header()
+        fields = self._fields
+        while name not in fields and self._scan_pos is not None:
+            field = _next_field(self.text, self._scan_pos)
+            if field is None:
+                self._scan_pos = None
+                break
+            fields.setdefault(field[0], field[1:3])
+            self._scan_pos = field[3]
+        return fields.get(name)
 
-    return bib_entries
+    def get(self, name, default=None):
+        """
+        Returns the raw value of a field without its delimiters, or `default`.
+        """
+        span = self._span(name.lower())
+        return self.text[span[0]:span[1]] if span else default
+
+    def fields(self):
+        """
+        Returns all fields as a dict from lowercase name to raw value, in entry order.
+        """
+        self._span('')  # No field is called '', so this scans the whole entry
+        return {name: self.text[start:end] for name, (start, end) in self._fields.items()}
+
+    def rewrite_fields(self, transform):
+        """
+        Returns the text of the entry with every field passed through
+        `transform(name, value)` in a single scan; see `utils.transforms`.
+
+        The transform gets the lowercase name and raw value of each field and
+        returns the new value, or None to remove the field together with its
+        separator. Everything else in the entry is copied as is.
+        """
+        text = self.text
+        header = _ENTRY_HEAD_STR.search(text)
+        pos = 0
+        if header:
+            pos = text.find(',', header.end())
+            if pos < 0:
+                return text  # No fields
+        pieces = []
+        copied = 0
+        while (field := _next_field(text, pos)) is not None:
+            name, start, end, next_pos = field
+            value = text[start:end]
+            new_value = transform(name, value)
+            if new_value is None:
+                pieces.append(text[copied:pos])  # Up to the separator before the field
+                copied = next_pos
+            elif new_value != value:
+                pieces += (text[copied:start], new_value)
+                copied = end
+            pos = next_pos
+        pieces.append(text[copied:])
+        return ''.join(pieces)
+
+    @property
+    def title(self):
+        return self.get('title')
+
+    @property
+    def doi(self):
+        doi = self.get('doi')
+        return doi.strip() if doi else None
+
+    def _splice(self, start, end, value):
+        """Replaces `text[start:end]` and moves the offsets that come after it."""
+        shift = len(value) - (end - start)
+        self._text = self.text[:start] + value + self.text[end:]
+        self._fields = {name: (s + shift, e + shift) if s >= end else (s, e) for name, (s, e) in self._fields.items()}
+        if self._key_span and self._key_span[0] >= end:
+            self._key_span = (self._key_span[0] + shift, self._key_span[1] + shift)
+        if self._scan_pos is not None and self._scan_pos >= end:
+            self._scan_pos += shift
+
+    def set_field(self, name, value):
+        """
+        Replaces the value of a field, keeping its delimiters, or appends the
+        field if the entry does not have it yet.
+        """
+        name = name.lower()
+        span = self._span(name)
+        if span:
+            self._splice(span[0], span[1], value)
+            self._fields[name] = (span[0], span[0] + len(value))
+            return
+        body = self.text.rstrip()
+        body = body[:len(body) - 1].rstrip()  # Up to the closing delimiter
+        addition = f'{"" if body.endswith(",") else ","}\n  {name} = {{'
+        self._splice(len(body), len(body), addition + value + '}')
+        self._fields[name] = (len(body) + len(addition), len(body) + len(addition) + len(value))
+
+    def set_key(self, key):
+        """
+        Replaces the citation key, e.g. to keep the original key of an updated entry.
+        """
+        self._parse_header()
+        if self._key_span:
+            self._splice(self._key_span[0], self._key_span[1], key)
+            self._key_span = (self._key_span[0], self._key_span[0] + len(key))
+        self.key = key
 
 
 def extract_title(entry):
@@ -41,7 +428,31 @@ def extract_title(entry):
         entry (str): A BibTeX entry.
 
     Returns:
-        str: The title of the entry, or None if no title is found.
+        str: The title of the entry, including any nested braces, or None if
+        no title is found.
+    """
+    return BibEntry.from_text(entry).title
+
+
+def normalize_title(title):
+    """Reduces a title to its lowercase letters, for comparing titles across sources.
+
+    Args:
+        title (str): A paper title.
+
+    Returns:
+        str: The letters of the title, lowercased and concatenated.
+    """
+    return ''.join(re.findall(r'[A-Za-z]+', title)).lower()
+
+
+def extract_doi(entry):
+    """Extracts the DOI from a BibTeX entry.
+
+    Args:
+        entry (str): A BibTeX entry.
+
+    Returns:
+        str: The DOI of the entry, or None if no DOI is found.
     """
-    match = re.search(r'\btitle\s*=\s*\{(.+?)\}', entry, re.IGNORECASE)
-    return match.group(1) if match else None
+    return BibEntry.from_text(entry).doi
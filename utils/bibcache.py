@@ -0,0 +1,123 @@
+import hashlib
+import os
+import struct
+import sys
+from array import array
+
+from utils.bib import index_bib_entries, open_bib_buffer
+
+# Layout of a sidecar file:
+#   header   magic, .bib size, .bib mtime in ns, SHA-1 of the .bib contents, number of entries
+#   offsets  per entry: uint64 start, uint64 end, little-endian
+#   names    per entry: `key \0 entry_type \0` in UTF-8
+# Bump the magic whenever the layout changes.
+MAGIC = b'BIBIDX03'
+_HEADER = struct.Struct('<8sQQ20sQ')
+
+
+def cache_path(bib_name):
+    """Returns the path of the sidecar index file for a .bib file.
+
+    Args:
+        bib_name (str): The name of the .bib file.
+
+    Returns:
+        str: Path of the hidden `.<name>.index` file next to the .bib file.
+    """
+    directory, base = os.path.split(os.path.abspath(bib_name))
+    return os.path.join(directory, f'.{base}.index')
+
+
+def _read_cache(path):
+    """Returns `(size, mtime_ns, digest, data)` of a sidecar file, or None if unusable."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < _HEADER.size or data[:len(MAGIC)] != MAGIC:
+        return None
+    _, size, mtime_ns, digest, _ = _HEADER.unpack_from(data)
+    return size, mtime_ns, digest, data
+
+
+def _decode(data):
+    """Rebuilds the index stored in a sidecar file, or returns None if it is damaged."""
+    count = _HEADER.unpack_from(data)[4]
+    names_start = _HEADER.size + 16 * count
+    offsets = array('Q')
+    try:
+        offsets.frombytes(data[_HEADER.size:names_start])
+        names = data[names_start:].decode('utf-8').split('\0')
+    except ValueError:
+        return None
+    if len(offsets) != 2 * count or len(names) != 2 * count + 1:
+        return None
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    return dict(zip(names[0::2], zip(offsets[0::2], offsets[1::2], names[1::2])))
+
+
+def _write_cache(path, stat, digest, index):
+    if any('\0' in key for key in index):
+        return  # Cannot be stored; such a file is just tokenized every time
+    offsets = array('Q', [offset for start, end, _ in index.values() for offset in (start, end)])
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    names = ''.join(f'{key}\0{entry_type}\0' for key, (_, _, entry_type) in index.items())
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, digest, len(index)))
+            f.write(offsets.tobytes())
+            f.write(names.encode('utf-8'))
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache is an optimisation only; read-only directories just skip it.
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def load_bib_index(bib_name, buf=None):
+    """Loads the parse index of a .bib file, rebuilding the sidecar cache if needed.
+
+    The sidecar only stores each entry's key, byte offsets and type; titles,
+    DOIs and other fields are read from the entry text when needed. It is
+    trusted when the file size and mtime match, which costs one read of the
+    sidecar (about 16 bytes plus the key per entry). Otherwise the content
+    hash is compared, and only if that differs is the whole file tokenized
+    again; there is no cheaper partial update, since an edit shifts the
+    offsets of every later entry.
+
+    Args:
+        bib_name (str): The name of the .bib file.
+        buf (bytes | mmap.mmap, optional): Contents of the .bib file, if already
+            loaded. The file is memory-mapped on demand otherwise.
+
+    Returns:
+        dict: Mapping from citation key to `(start, end, entry_type)`, with byte
+        offsets into the file, as returned by `utils.bib.index_bib_entries`.
+    """
+    path = cache_path(bib_name)
+    stat = os.stat(bib_name)
+    cache = _read_cache(path)
+    if cache and cache[0] == stat.st_size and cache[1] == stat.st_mtime_ns:
+        index = _decode(cache[3])
+        if index is not None:
+            return index
+
+    if buf is None:
+        with open_bib_buffer(bib_name) as mapped:
+            return _refresh_index(path, stat, mapped, cache)
+    return _refresh_index(path, stat, buf, cache)
+
+
+def _refresh_index(path, stat, buf, cache):
+    digest = hashlib.sha1(buf).digest()
+    index = _decode(cache[3]) if cache and cache[2] == digest else None  # Touched but unchanged
+    if index is None:
+        index = index_bib_entries(buf)
+    _write_cache(path, stat, digest, index)
+    return index
@@ -0,0 +1,185 @@
+import json
+import os
+from collections import OrderedDict
+
+# Kept free of the cleaner's own imports: the client only needs to send a request.
+DEFAULT_SOCKET_PATH = os.environ.get(
+    'BIBTEX_CLEANER_SOCKET', os.path.join(os.path.expanduser('~'), '.cache', 'bibtex-clean-tool', 'cleaner.sock'))
+
+
+class LRUCache:
+    """
+    A mapping that holds at most `capacity` items and evicts the least recently used.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._items = OrderedDict()
+
+    def get(self, key):
+        """
+        Return the item stored under `key`, or None, and mark it as recently used.
+        """
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _respond(handle, body):
+    try:
+        request = json.loads(body)
+    except ValueError as e:
+        return {'ok': False, 'error': f'Invalid request: {e}'}
+    if not isinstance(request, dict):
+        return {'ok': False, 'error': 'Invalid request: expected a JSON object'}
+    try:
+        return handle(request)
+    except Exception as e:  # Reported to the client; the daemon keeps serving
+        return {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+
+
+def _parse_reply(body):
+    try:
+        reply = json.loads(body)
+    except ValueError:
+        reply = None
+    if not isinstance(reply, dict):
+        return {'ok': False, 'error': 'No valid reply from the daemon'}
+    return reply
+
+
+def serve_requests(handle, socket_path=None, port=None):
+    """
+    Answer JSON requests with `handle(request)` until interrupted with Ctrl+C.
+
+    Requests are handled one at a time, so `handle` may keep state between
+    them without locking.
+
+    Args:
+        handle (function): Takes the request dict and returns the response dict.
+            Exceptions are sent back as `{"ok": false, "error": ...}`.
+        socket_path (str, optional): Unix socket to listen on, with one
+            newline-terminated JSON request and response per connection. Only
+            the current user may connect. Defaults to `DEFAULT_SOCKET_PATH`.
+        port (int, optional): Listen for `POST` requests with a JSON body on
+            `http://127.0.0.1:<port>/` instead of a Unix socket. Requests must
+            have the `application/json` content type and a `127.0.0.1:<port>` or
+            `localhost:<port>` host, so that web pages open in a local browser
+            cannot submit cleans (such requests need a CORS preflight, which is
+            refused) or reach the daemon through DNS rebinding.
+    """
+    if port is not None:
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+
+        hosts = {f'127.0.0.1:{port}', f'localhost:{port}'}
+
+        class HTTPHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                if self.headers.get('Host', '').lower() not in hosts:
+                    status, response = 403, {'ok': False, 'error': 'Forbidden host'}
+                elif content_type != 'application/json':
+                    status, response = 415, {'ok': False, 'error': 'Expected an application/json request'}
+                else:
+                    try:
+                        length = int(self.headers.get('Content-Length', 0))
+                    except ValueError:
+                        length = 0
+                    status, response = 200, _respond(handle, self.rfile.read(length))
+                body = json.dumps(response).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', port), HTTPHandler)
+        address = f'http://127.0.0.1:{port}/'
+    else:
+        import socketserver
+
+        class StreamHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.wfile.write(json.dumps(_respond(handle, self.rfile.readline())).encode('utf-8') + b'\n')
+
+        socket_path = socket_path or DEFAULT_SOCKET_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        if os.path.exists(socket_path):
+            try:
+                send_request({}, socket_path, timeout=1)
+            except OSError:
+                os.remove(socket_path)  # Left behind by a daemon that did not shut down cleanly
+            else:
+                raise OSError(f"Another daemon is already listening on {socket_path}")
+        umask = os.umask(0o177)
+        try:
+            server = socketserver.UnixStreamServer(socket_path, StreamHandler)
+        finally:
+            os.umask(umask)
+        address = socket_path
+
+    print(f"Listening on {address}. Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped.")
+    finally:
+        server.server_close()
+        if port is None:
+            os.remove(socket_path)
+
+
+def send_request(request, socket_path=None, port=None, timeout=120):
+    """
+    Send one request to a daemon started with `serve_requests`.
+
+    Args:
+        request (dict): The JSON-serializable request.
+        socket_path (str, optional): Unix socket of the daemon. Defaults to `DEFAULT_SOCKET_PATH`.
+        port (int, optional): Connect to `http://127.0.0.1:<port>/` instead.
+        timeout (float, optional): Seconds to wait for the response. Defaults to 120.
+
+    Returns:
+        dict: The response, or `{"ok": false, "error": ...}` if the daemon's reply
+        is empty or not a JSON object.
+
+    Raises:
+        OSError: If no daemon is listening.
+    """
+    import socket
+
+    body = json.dumps(request).encode('utf-8')
+    if port is not None:
+        import http.client
+
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        try:
+            connection.request('POST', '/', body, {'Content-Type': 'application/json'})
+            return _parse_reply(connection.getresponse().read())
+        finally:
+            connection.close()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path or DEFAULT_SOCKET_PATH)
+        sock.sendall(body + b'\n')
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return _parse_reply(b''.join(chunks))
@@ -0,0 +1,229 @@
+import math
+import re
+from collections import Counter
+
+from utils.bib import normalize_title
+
+_WORDS = re.compile(r'[a-z]+')
+_YEAR = re.compile(r'\d{4}')
+_DOI_PREFIX = re.compile(r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)', re.IGNORECASE)
+# Exact title matches are only trusted on their own for titles at least this long.
+_MIN_TITLE_LETTERS = 20
+
+
+def normalize_doi(doi):
+    """Strips resolver prefixes and case from a DOI.
+
+    Args:
+        doi (str): DOI as written in the entry, possibly as a doi.org URL.
+
+    Returns:
+        str: The bare, lowercase DOI, or None if empty.
+    """
+    doi = _DOI_PREFIX.sub('', doi.strip()).strip().lower() if doi else ''
+    return doi or None
+
+
+def first_author(entry):
+    """Returns the lowercase letters of the first author's surname, or None."""
+    authors = entry.get('author')
+    if not authors:
+        return None
+    first = re.split(r'\s+and\s+', authors.strip(), maxsplit=1)[0]
+    surname = first.split(',')[0] if ',' in first else (first.split() or [''])[-1]
+    return normalize_title(surname) or None
+
+
+def entry_year(entry):
+    """Returns the four-digit year of an entry from its `year` or `date` field, or None."""
+    year = _YEAR.search(entry.get('year') or entry.get('date') or '')
+    return year.group() if year else None
+
+
+def title_similarity(a, b):
+    """Jaccard similarity of the word sets of two titles.
+
+    Args:
+        a (set): Lowercase words of the first title.
+        b (set): Lowercase words of the second title.
+
+    Returns:
+        float: Between 0 (no words in common) and 1 (same words).
+    """
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def similar_pairs(block, words, threshold):
+    """Finds the pairs in a block whose titles are at least `threshold` similar.
+
+    Uses prefix filtering: with the words of each title ordered from rarest
+    to most common, two titles can only reach the threshold if they share one
+    of the first `n - ceil(threshold * n) + 1` words, so only those are indexed
+    and probed instead of comparing all pairs. Titles are visited from
+    shortest to longest and indexed by word count, as titles whose lengths
+    differ by more than the threshold allows can never be similar enough.
+
+    Args:
+        block (list): Indexes into `words` of the entries to compare.
+        words (list): Word set of each entry's title.
+        threshold (float): Minimum `title_similarity`.
+
+    Yields:
+        tuple: `(i, j)` pairs of similar entries.
+    """
+    frequency = Counter(word for i in block for word in words[i])
+    index = {}
+    for i in sorted(block, key=lambda i: len(words[i])):
+        size = len(words[i])
+        ordered = sorted(words[i], key=lambda word: (frequency[word], word))
+        prefix = ordered[:size - math.ceil(threshold * size) + 1]
+        candidates = set()
+        for word in prefix:
+            for other_size in range(math.ceil(threshold * size), size + 1):
+                candidates.update(index.get((word, other_size), ()))
+            index.setdefault((word, size), []).append(i)
+        for j in candidates:
+            if title_similarity(words[i], words[j]) >= threshold:
+                yield j, i
+
+
+def find_duplicates(entries, threshold=0.85, max_block=5000):
+    """Finds clusters of entries that describe the same work under different keys.
+
+    Entries are grouped into blocks by DOI, by normalized title (letters only,
+    as used for IEEE lookups) and by first author and year, so only entries
+    sharing a block are ever compared:
+
+    - Same DOI: duplicates.
+    - Same normalized title and first author, at most a year apart: duplicates.
+      Without an author, only long titles count, and only if no two different
+      authors share the title.
+    - Same first author and year: duplicates if the titles have a word
+      similarity (see `title_similarity`) of at least `threshold`.
+
+    This keeps the pass near-linear; within author/year blocks, candidates are
+    further narrowed by `similar_pairs`, and blocks with more than `max_block`
+    entries are skipped for the similarity check.
+
+    Args:
+        entries (dict): Mapping from citation key to `BibEntry`.
+        threshold (float, optional): Minimum title similarity for the author/year
+            block. Defaults to 0.85.
+        max_block (int, optional): Largest author/year block to compare pairwise.
+            Defaults to 5000.
+
+    Returns:
+        list: Clusters of two or more keys, each in file order, ordered by their first key.
+    """
+    keys = list(entries)
+    parent = list(range(len(keys)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        i, j = find(i), find(j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+
+    by_doi, by_title, by_author_year = {}, {}, {}
+    words, authors, years = [], [], []
+    for i, key in enumerate(keys):
+        entry = entries[key]
+        title = entry.title or ''
+        normalized = normalize_title(title)
+        author = first_author(entry)
+        year = entry_year(entry)
+        words.append(set(_WORDS.findall(title.lower())))
+        authors.append(author)
+        years.append(int(year) if year else None)
+
+        doi = normalize_doi(entry.doi)
+        if doi:
+            by_doi.setdefault(doi, []).append(i)
+        if normalized:
+            by_title.setdefault(normalized, []).append(i)
+        if author and year:
+            by_author_year.setdefault((author, year), []).append(i)
+
+    for block in by_doi.values():
+        for i in block[1:]:
+            union(block[0], i)
+
+    for normalized, block in by_title.items():
+        if len(block) < 2:
+            continue
+        groups = {}
+        for i in block:
+            groups.setdefault(authors[i], []).append(i)
+        unknown = groups.pop(None, [])
+        for group in groups.values():
+            dated = sorted((years[i], i) for i in group if years[i])
+            for (year, i), (next_year, j) in zip(dated, dated[1:]):
+                if next_year - year <= 1:  # Preprint and publication, not a later edition
+                    union(i, j)
+            anchor = dated[0][1] if dated else group[0]
+            for i in group:
+                if not years[i]:
+                    union(anchor, i)
+        if unknown and len(normalized) >= _MIN_TITLE_LETTERS and len(groups) <= 1:
+            anchor = next(iter(groups.values()))[0] if groups else unknown[0]
+            for i in unknown:
+                union(anchor, i)
+
+    for block in by_author_year.values():
+        if 1 < len(block) <= max_block:
+            for i, j in similar_pairs(block, words, threshold):
+                union(i, j)
+
+    clusters = {}
+    for i in range(len(keys)):
+        clusters.setdefault(find(i), []).append(keys[i])
+    return [cluster for _, cluster in sorted(clusters.items()) if len(cluster) > 1]
+
+
+def choose_canonical(cluster, entries, rank=None):
+    """Picks the entry of a duplicate cluster to keep.
+
+    Cited entries are preferred, so existing citations stay valid; then
+    entries with a DOI, then the most complete (longest) entry, then the
+    first one in the file.
+
+    Args:
+        cluster (list): Keys of the duplicates, in file order.
+        entries (dict): Mapping from citation key to `BibEntry`.
+        rank (dict, optional): Position of each cited key in the manuscript.
+
+    Returns:
+        str: The key to keep.
+    """
+    rank = rank or {}
+    return min(cluster, key=lambda key: (rank.get(key, len(rank)), not entries[key].doi,
+                                         -len(entries[key].text), cluster.index(key)))
+
+
+def merge_duplicates(entries, clusters, cited=()):
+    """Removes duplicates from `entries`, keeping one entry per cluster.
+
+    Args:
+        entries (dict): Mapping from citation key to `BibEntry`. Modified in place.
+        clusters (list): Clusters as returned by `find_duplicates`.
+        cited (iterable, optional): Keys cited in the manuscript, in order.
+
+    Returns:
+        dict: Mapping from each removed key to the key that replaces it.
+    """
+    rank = {key: i for i, key in enumerate(cited)}
+    renames = {}
+    for cluster in clusters:
+        keep = choose_canonical(cluster, entries, rank)
+        for key in cluster:
+            if key != keep:
+                renames[key] = keep
+                del entries[key]
+    return renames
@@ -0,0 +1,124 @@
+import os
+import threading
+import urllib.parse
+
+from utils.dedupe import normalize_doi
+from utils.metrics import get_metrics
+from utils.ratelimit import TokenBucket
+
+# Overridable so the checker can be pointed at a local stub server.
+DOI_RESOLVER_URL = os.environ.get('DOI_RESOLVER_URL', 'https://doi.org').rstrip('/')
+# DOIs registered by IEEE, which resolve to their IEEE Xplore document page.
+IEEE_DOI_PREFIX = '10.1109/'
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_doi_rate_limiter():
+    """
+    Return the process-wide rate limiter for DOI requests, creating it on first use.
+
+    DOI lookups go to the registration agencies rather than IEEE Xplore, so
+    they have their own, more generous request budget.
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = TokenBucket(rate=5, burst=5)
+        return _default_limiter
+
+
+def doi_url(doi):
+    """
+    Return the resolver URL of a DOI, or None if `doi` is empty.
+    """
+    doi = normalize_doi(doi)
+    return f"{DOI_RESOLVER_URL}/{urllib.parse.quote(doi, safe='/:;()')}" if doi else None
+
+
+def is_doi_url(url):
+    return url.startswith(DOI_RESOLVER_URL + '/')
+
+
+def is_ieee_doi(doi):
+    return (normalize_doi(doi) or '').startswith(IEEE_DOI_PREFIX)
+
+
+def resolve_doi(url, limiter=None, timeout=30):
+    """
+    Return where the resolver redirects a DOI to, without loading that page.
+
+    Args:
+        url (str): Resolver URL, as returned by `doi_url`.
+        limiter (TokenBucket, optional): Rate limiter. Defaults to the process-wide DOI limiter.
+        timeout (float, optional): Seconds to wait for the response. Defaults to 30.
+
+    Returns:
+        str: The landing page URL, or None if the DOI is unknown.
+    """
+    import urllib.error
+    import urllib.request
+
+    class NoRedirect(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, *args, **kwargs):
+            return None  # Surfaces the redirect as an HTTPError carrying its Location
+
+    limiter = limiter or get_doi_rate_limiter()
+    opener = urllib.request.build_opener(NoRedirect)
+    metrics = get_metrics()
+    with metrics.timer('doi_resolve'):
+        metrics.observe('rate_limit_wait', limiter.acquire())
+        try:
+            with opener.open(urllib.request.Request(url, method='HEAD'), timeout=timeout):
+                return None  # Not a redirect
+        except urllib.error.HTTPError as e:
+            if e.code in (301, 302, 303, 307, 308):
+                limiter.reward()
+                return urllib.parse.urljoin(url, e.headers.get('Location', ''))
+            if e.code == 404:
+                return None
+            limiter.penalize()
+            raise
+        except OSError:
+            limiter.penalize()
+            raise
+
+
+def fetch_doi_bibtex(url, limiter=None, timeout=30):
+    """
+    Fetch the BibTeX of a DOI through content negotiation on the resolver.
+
+    Used for DOIs of other publishers, which the checker only verifies when
+    asked to (`--crossref`). A single HTTP request with `Accept: application/x-bibtex`; Crossref and
+    DataCite answer it for the DOIs they register, without any page load.
+
+    Args:
+        url (str): Resolver URL, as returned by `doi_url`.
+        limiter (TokenBucket, optional): Rate limiter. Defaults to the process-wide DOI limiter.
+        timeout (float, optional): Seconds to wait for the response. Defaults to 30.
+
+    Returns:
+        str: The BibTeX entry, or None if the DOI is unknown or has no BibTeX.
+    """
+    import urllib.error
+    import urllib.request
+
+    limiter = limiter or get_doi_rate_limiter()
+    request = urllib.request.Request(url, headers={'Accept': 'application/x-bibtex; charset=utf-8'})
+    metrics = get_metrics()
+    with metrics.timer('doi_fetch'):
+        metrics.observe('rate_limit_wait', limiter.acquire())
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                bibtex = response.read().decode('utf-8', errors='replace').strip()
+        except urllib.error.HTTPError as e:
+            if e.code in (404, 406):  # Unknown DOI, or no BibTeX for it
+                return None
+            limiter.penalize()
+            raise
+        except OSError:
+            limiter.penalize()
+            raise
+    limiter.reward()
+    return bibtex if bibtex.startswith('@') else None
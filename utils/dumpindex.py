@@ -0,0 +1,323 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+
+from utils.bib import BibEntry, normalize_title
+from utils.dedupe import normalize_doi, first_author, entry_year
+from utils.metrics import get_metrics
+
+# Layout of an index file:
+#   header   magic, number of title slots, title table offset, number of DOI slots, DOI table offset
+#   records  per record: uint32 length, then `normalized title \0 DOI \0 BibTeX` in UTF-8
+#   tables   sorted (uint64 hash, uint64 record offset) pairs, one table for titles and one for DOIs
+MAGIC = b'BIBDUMP1'
+_HEADER = struct.Struct('<8sQQQQ')
+_SLOT = struct.Struct('<QQ')
+_LENGTH = struct.Struct('<I')
+
+# DBLP record elements that describe publications; `www` holds author home pages.
+DBLP_TYPES = {'article': 'article', 'inproceedings': 'inproceedings', 'proceedings': 'proceedings',
+              'book': 'book', 'incollection': 'incollection', 'phdthesis': 'phdthesis',
+              'mastersthesis': 'mastersthesis'}
+CROSSREF_TYPES = {'journal-article': 'article', 'proceedings-article': 'inproceedings',
+                  'book-chapter': 'incollection', 'book': 'book', 'monograph': 'book',
+                  'edited-book': 'book', 'dissertation': 'phdthesis', 'posted-content': 'misc'}
+_SPECIAL = re.compile(r'(?<!\\)([&%$#_])')
+# Fields whose text dumps carry verbatim and LaTeX would misread; identifiers such as DOIs stay as they are.
+_TEXT_FIELDS = {'title', 'author', 'journal', 'booktitle', 'publisher', 'school'}
+
+
+def _hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _escape(name, value):
+    """Collapses whitespace and escapes the LaTeX special characters of text fields."""
+    value = ' '.join(value.split())
+    return _SPECIAL.sub(r'\\\1', value) if name in _TEXT_FIELDS else value
+
+
+def record_to_bibtex(entry_type, key, fields):
+    """Renders a dump record as a BibTeX entry.
+
+    Args:
+        entry_type (str): BibTeX entry type, e.g. `article`.
+        key (str): Citation key; the checker replaces it with the original key.
+        fields (list): `(name, value)` pairs, in output order. Empty values are skipped.
+
+    Returns:
+        str: The entry.
+    """
+    body = ',\n'.join(f'  {name} = {{{_escape(name, value)}}}' for name, value in fields if value)
+    return f'@{entry_type}{{{key},\n{body}\n}}'
+
+
+def _open_dump(path):
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def iter_dblp_records(path):
+    """Streams the publications of a DBLP XML dump (`dblp.xml`, optionally gzipped).
+
+    Named character entities are resolved without loading `dblp.dtd`, and
+    every record is discarded once read, so memory stays flat.
+
+    Args:
+        path (str): Path of the dump.
+
+    Yields:
+        tuple: `(title, doi, bibtex)` per publication.
+    """
+    import html.entities
+    import xml.etree.ElementTree as ET
+
+    parser = ET.XMLParser()
+    parser.entity.update((name, chr(code)) for name, code in html.entities.name2codepoint.items())
+    with _open_dump(path) as f:
+        context = ET.iterparse(f, events=('start', 'end'), parser=parser)
+        _, root = next(context)
+        for event, element in context:
+            if event != 'end' or element.tag not in DBLP_TYPES and element.tag != 'www':
+                continue  # Fields are read from their record once it is complete
+            if element.tag in DBLP_TYPES:
+                values = {}
+                for child in element:
+                    values.setdefault(child.tag, []).append(''.join(child.itertext()).strip())
+                title = ' '.join(values.get('title', [''])).rstrip('.')
+                doi = next((normalize_doi(url) for url in values.get('ee', ())
+                            if 'doi.org/' in url), None)
+                fields = [('title', title),
+                          ('author', ' and '.join(values.get('author') or values.get('editor', []))),
+                          ('journal', ' '.join(values.get('journal', []))),
+                          ('booktitle', ' '.join(values.get('booktitle', []))),
+                          ('school', ' '.join(values.get('school', []))),
+                          ('publisher', ' '.join(values.get('publisher', []))),
+                          ('volume', ' '.join(values.get('volume', []))),
+                          ('number', ' '.join(values.get('number', []))),
+                          ('pages', ' '.join(values.get('pages', []))),
+                          ('year', ' '.join(values.get('year', []))),
+                          ('doi', doi)]
+                if title:
+                    yield title, doi, record_to_bibtex(DBLP_TYPES[element.tag],
+                                                       'DBLP:' + element.get('key', ''), fields)
+            root.clear()  # Drop the records read so far
+
+
+def _crossref_works(f):
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        # Snapshot files wrap their works in `items`; JSONL exports hold one work per line.
+        yield from record.get('items', [record]) if isinstance(record, dict) else record
+
+
+def iter_crossref_records(path):
+    """Streams the works of a Crossref metadata snapshot.
+
+    Accepts JSON Lines with one work per line, or the snapshot's files of
+    `{"items": [...]}` objects, optionally gzipped.
+
+    Args:
+        path (str): Path of the dump.
+
+    Yields:
+        tuple: `(title, doi, bibtex)` per work.
+    """
+    with _open_dump(path) as f:
+        for work in _crossref_works(f):
+            title = ' '.join(work.get('title') or [])
+            if not title:
+                continue
+            doi = normalize_doi(work.get('DOI'))
+            authors = ' and '.join(
+                f"{author['family']}, {author['given']}" if author.get('given') else author.get('family', '')
+                for author in work.get('author', []) if author.get('family'))
+            date = (work.get('issued') or work.get('published') or {}).get('date-parts') or [[None]]
+            container = ' '.join(work.get('container-title') or [])
+            entry_type = CROSSREF_TYPES.get(work.get('type'), 'misc')
+            fields = [('title', title),
+                      ('author', authors),
+                      ('journal' if entry_type == 'article' else 'booktitle', container),
+                      ('publisher', work.get('publisher')),
+                      ('volume', work.get('volume')),
+                      ('number', work.get('issue')),
+                      ('pages', work.get('page')),
+                      ('year', str(date[0][0]) if date[0] and date[0][0] else None),
+                      ('doi', doi)]
+            yield title, doi, record_to_bibtex(entry_type, doi or normalize_title(title)[:40], fields)
+
+
+def iter_dump_records(path):
+    """Streams a DBLP (`.xml`) or Crossref (`.json`/`.jsonl`) dump, chosen by file name."""
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.xml'):
+        return iter_dblp_records(path)
+    if name.endswith(('.json', '.jsonl')):
+        return iter_crossref_records(path)
+    raise ValueError(f"Unknown dump format: {path} (expected .xml, .json or .jsonl, optionally .gz)")
+
+
+def build_dump_index(records, index_path):
+    """Writes an index file for `DumpIndex`.
+
+    Records are appended to the file as they stream in; only a hash and an
+    offset per title and DOI are held in memory, and sorted at the end.
+
+    Args:
+        records (iterable): `(title, doi, bibtex)` tuples, e.g. from `iter_dump_records`.
+        index_path (str): Output path. Written atomically.
+
+    Returns:
+        int: Number of records indexed.
+    """
+    titles, dois = [], []
+    count = 0
+    tmp_path = f'{index_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, 0, 0, 0, 0))
+        for title, doi, bibtex in records:
+            normalized = normalize_title(title)
+            doi = normalize_doi(doi) or ''
+            offset = f.tell()
+            data = f'{normalized}\0{doi}\0{bibtex}'.encode('utf-8')
+            f.write(_LENGTH.pack(len(data)) + data)
+            if normalized:
+                titles.append(_hash(normalized) << 64 | offset)
+            if doi:
+                dois.append(_hash(doi) << 64 | offset)
+            count += 1
+
+        tables = []
+        for slots in (titles, dois):
+            slots.sort()  # By hash, then by position in the dump
+            tables.append((len(slots), f.tell()))
+            for slot in slots:
+                f.write(_SLOT.pack(slot >> 64, slot & 0xFFFFFFFFFFFFFFFF))
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, *tables[0], *tables[1]))
+    os.replace(tmp_path, index_path)
+    return count
+
+
+class DumpIndex:
+    """
+    Memory-mapped lookups of BibTeX by normalized title or DOI in a local
+    bulk metadata dump, as indexed by `build_dump_index`.
+
+    A lookup is a binary search over a sorted table of 64-bit hashes, so it
+    touches a few pages of the file and takes microseconds, also for dumps
+    with millions of records. Hash collisions are ruled out by comparing the
+    title or DOI stored with each record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, *tables = _HEADER.unpack_from(self._buf)
+        if magic != MAGIC:
+            self._buf.close()
+            raise ValueError(f"{path} is not a metadata dump index")
+        self._titles = tuple(tables[:2])
+        self._dois = tuple(tables[2:])
+
+    def __len__(self):
+        return self._titles[0]
+
+    def _record(self, offset):
+        length, = _LENGTH.unpack_from(self._buf, offset)
+        start = offset + _LENGTH.size
+        return self._buf[start:start + length].decode('utf-8').split('\0', 2)
+
+    def _find(self, table, field, value):
+        size, base = table
+        target = _hash(value)
+        low, high = 0, size
+        while low < high:  # Leftmost slot with the target hash
+            middle = (low + high) // 2
+            if _SLOT.unpack_from(self._buf, base + middle * _SLOT.size)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        for i in range(low, size):
+            digest, offset = _SLOT.unpack_from(self._buf, base + i * _SLOT.size)
+            if digest != target:
+                break
+            record = self._record(offset)
+            if record[field] == value:
+                found.append(record[2])
+        return found
+
+    def find_title(self, title):
+        """
+        Return the BibTeX of all records with this title, in dump order.
+        """
+        normalized = normalize_title(title)
+        return self._find(self._titles, 0, normalized) if normalized else []
+
+    def find_doi(self, doi):
+        """
+        Return the BibTeX of all records with this DOI (with or without resolver prefix).
+        """
+        doi = normalize_doi(doi)
+        return self._find(self._dois, 1, doi) if doi else []
+
+    def resolve(self, entry):
+        """
+        Find the dump record describing a bibliography entry.
+
+        The DOI decides when the entry has one in the dump. Otherwise the
+        title has to match and so does the first author or the year, since
+        titles such as "Introduction" or "Editorial" are shared by many
+        unrelated records; among those, the one matching both is preferred,
+        then the first in the dump.
+
+        Args:
+            entry (BibEntry | str): The entry to verify.
+
+        Returns:
+            str: The BibTeX of the record, or None if the dump has no match.
+        """
+        if isinstance(entry, str):
+            entry = BibEntry.from_text(entry)
+        with get_metrics().timer('dump_lookup'):
+            by_doi = self.find_doi(entry.doi)
+            if by_doi:
+                return by_doi[0]
+            candidates = self.find_title(entry.title or '')
+            author, year = first_author(entry), entry_year(entry)
+
+            def score(bibtex):
+                record = BibEntry.from_text(bibtex)
+                return ((author is not None and first_author(record) == author)
+                        + (year is not None and entry_year(record) == year))
+            best = max(candidates, key=score, default=None)  # Ties keep dump order
+            return best if best is not None and score(best) >= 1 else None
+
+    def close(self):
+        self._buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Index a DBLP XML or Crossref JSON(L) dump for offline checking.')
+    parser.add_argument('dump', help='The dump (.xml, .json or .jsonl, optionally .gz)')
+    parser.add_argument('index', help='Path of the index file to write')
+    args = parser.parse_args()
+    count = build_dump_index(iter_dump_records(args.dump), args.index)
+    print(f"Indexed {count} records as {args.index}")
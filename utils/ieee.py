@@ -1,21 +1,33 @@
 import re
+import sys
 import time
-import requests
+import html
 import urllib.parse
 import os
 import random
 import platform
+import queue
+import threading
+import atexit
+from contextlib import contextmanager
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+# Selenium is imported inside the functions that drive a browser, and urllib.request
+# inside those making plain requests, so that importing this module (and the
+# checker) does not load the browser or HTTP stack.
 
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.core.os_manager import ChromeType
+from utils.bib import normalize_title
+from utils.ratelimit import TokenBucket
+from utils.metrics import get_metrics
+
+# Overridable so the checker can be pointed at a local stub server serving fixture pages.
+IEEE_XPLORE_URL = os.environ.get('IEEE_XPLORE_URL', 'https://ieeexplore.ieee.org').rstrip('/')
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/115.0.0.0 Safari/537.36")
+
+# Document numbers in the URL forms IEEE Xplore uses: /document/<n>, /abstract/document/<n>, ?arnumber=<n>
+_DOCUMENT_NUMBER = re.compile(r'(?:/document/|[?&]arnumber=)(\d+)')
+# A <br> tag, with the newline that may follow it, but not the next line's indentation
+_LINE_BREAK = re.compile(r'<br\s*/?>(?:\r?\n)?', re.IGNORECASE)
 
 
 def setup_driver():
@@ -26,6 +38,10 @@ def setup_driver():
     - Sets a realistic user-agent.
     - Disables GPU, sandboxing, and other automation-detectable features.
     """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+
     local = False
     if platform.system() == 'Darwin':
         local = True
@@ -37,8 +53,7 @@ def setup_driver():
     chrome_options.add_argument("--disable-dev-shm-usage")
     # Set user-agent to mimic a real browser session
     if not local:
-        chrome_options.add_argument(
-            "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36")
+        chrome_options.add_argument(f"user-agent={USER_AGENT}")
     # Exclude automation switches to reduce detection risk
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option("useAutomationExtension", False)
@@ -49,10 +64,149 @@ def setup_driver():
     else:
         service = webdriver.ChromeService()
         # Alternatively, uncomment below to use webdriver_manager for installation
+        # from webdriver_manager.chrome import ChromeDriverManager
+        # from webdriver_manager.core.os_manager import ChromeType
         # service = Service(ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install())
     return webdriver.Chrome(service=service, options=chrome_options)
 
 
+def is_timeout(exc):
+    """Whether `exc` is a Selenium timeout, without importing Selenium if nothing has."""
+    exceptions = sys.modules.get('selenium.common.exceptions')
+    return exceptions is not None and isinstance(exc, exceptions.TimeoutException)
+
+
+class DriverPool:
+    """
+    A bounded pool of reusable Selenium WebDrivers.
+
+    Starting Chrome costs seconds and hundreds of MB, so drivers are kept alive
+    and lent out one at a time instead of being created for every page.
+
+    - At most `size` drivers exist at once; borrowers block until one is free.
+    - Idle drivers are health-checked before being lent out and replaced if dead.
+    - A driver is recycled after it has been borrowed `max_pages` times, and
+      discarded when a borrower fails with anything other than a timeout.
+    """
+
+    def __init__(self, size=1, max_pages=50, factory=None):
+        self.size = size
+        self.max_pages = max_pages
+        self._factory = factory or setup_driver
+        self._idle = queue.LifoQueue()  # (driver, pages served), most recently used first
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass  # The browser may already be gone
+
+    @staticmethod
+    def _is_alive(driver):
+        try:
+            driver.current_url  # Cheap round trip to the browser
+            return True
+        except Exception:
+            return False
+
+    def _checkout(self):
+        while True:
+            try:
+                driver, pages = self._idle.get_nowait()
+            except queue.Empty:
+                with get_metrics().timer('driver_startup'):
+                    return self._factory(), 0
+            if self._is_alive(driver):
+                return driver, pages
+            self._quit(driver)
+
+    def _checkin(self, driver, pages, healthy):
+        with self._lock:
+            if healthy and not self._closed and pages < self.max_pages:
+                self._idle.put((driver, pages))
+                return
+        self._quit(driver)
+
+    @contextmanager
+    def driver(self):
+        """
+        Borrow a driver for the duration of a `with` block.
+
+        Yields:
+            WebDriver: A live driver, returned to the pool when the block exits.
+        """
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+        with self._slots:
+            driver, pages = self._checkout()
+            healthy = True
+            try:
+                yield driver
+            except BaseException as e:
+                healthy = is_timeout(e)  # Slow pages do not mean the browser is broken
+                raise
+            finally:
+                self._checkin(driver, pages + 1, healthy)
+
+    def close(self):
+        """
+        Quit all idle drivers. Drivers still borrowed are quit when returned.
+        """
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                driver, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """
+    Return the process-wide driver pool, creating it on first use.
+
+    The pool holds a single driver and is closed automatically at exit.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = DriverPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
+
+
+_default_limiter = None
+
+
+def get_rate_limiter():
+    """
+    Return the process-wide page-load rate limiter, creating it on first use.
+
+    Every page load against IEEE Xplore goes through this bucket unless the
+    caller passes its own, so concurrent workers share one request budget.
+    """
+    global _default_limiter
+    with _default_pool_lock:
+        if _default_limiter is None:
+            _default_limiter = TokenBucket()
+        return _default_limiter
+
+
 def human_delay(min_delay=1, max_delay=3):
     """
     Pause execution for a random interval between min_delay and max_delay seconds.
@@ -61,7 +215,17 @@ def human_delay(min_delay=1, max_delay=3):
     time.sleep(random.uniform(min_delay, max_delay))
 
 
-def search_ieee(title):
+class EmptyResultPage(Exception):
+    """
+    Raised when a search shows no results at all.
+
+    IEEE Xplore lists its closest matches even for unknown titles, so an
+    empty page usually means the request was throttled or blocked, and is
+    not evidence that the paper does not exist.
+    """
+
+
+def search_ieee(title, pool=None, limiter=None):
     """
     Search IEEE Xplore for a paper by its title.
 
@@ -70,34 +234,129 @@ def search_ieee(title):
 
     Args:
         title (str): Title of the target paper.
+        pool (DriverPool, optional): Pool to borrow a browser from. Defaults to
+            the process-wide pool.
+        limiter (TokenBucket, optional): Rate limiter for the page load. Defaults
+            to the process-wide limiter. It backs off when no results are shown.
 
     Returns:
-        str: URL of the first search result, or None if not found.
+        str: URL of the first search result, or None if its title does not match.
+
+    Raises:
+        EmptyResultPage: If the page shows no results.
     """
+    from selenium.webdriver.common.by import By
+
     # Encode title into URL and build search URL
-    search_url = f"https://ieeexplore.ieee.org/search/searchresult.jsp?newsearch=true&queryText={urllib.parse.quote(title)}"
+    search_url = f"{IEEE_XPLORE_URL}/search/searchresult.jsp?newsearch=true&queryText={urllib.parse.quote(title)}"
     os.write(1, f"title-based: {search_url}\n".encode())
+    limiter = limiter or get_rate_limiter()
 
-    driver = setup_driver()
-    try:
-        driver.get(search_url)
-        human_delay(3, 5)  # Allow page to load and dynamic elements to render
-        # Output page source for debugging purposes
-        os.write(1, f"{driver.page_source[:100]}\n".encode())
-        # Find elements containing search results; class name may need updating if IEEE changes their layout
-        result = driver.find_elements(By.CLASS_NAME, 'List-results-items')
-        if result:
-            # Extract the first result's link from its anchor tag
-            element = result[0].find_element(By.TAG_NAME, 'a')
-            def f(x): return ("".join(re.findall(r'[A-Za-z]+', x))).lower().strip()
-            if not f(title) == f(element.text):
-                return None
-            link = element.get_attribute('href')
-            os.write(1, f"paper-based: {link}\n".encode())
-            return link
-    finally:
-        driver.quit()  # Ensure driver is closed even if an error occurs
-    return None
+    metrics = get_metrics()
+    with metrics.timer('search'), (pool or get_driver_pool()).driver() as driver:
+        metrics.observe('rate_limit_wait', limiter.acquire())
+        try:
+            with metrics.timer('page_load'):
+                driver.get(search_url)
+            human_delay(3, 5)  # Allow page to load and dynamic elements to render
+            # Output page source for debugging purposes
+            os.write(1, f"{driver.page_source[:100]}\n".encode())
+            # Find elements containing search results; class name may need updating if IEEE changes their layout
+            result = driver.find_elements(By.CLASS_NAME, 'List-results-items')
+        except Exception:
+            limiter.penalize()
+            raise
+        if not result:
+            limiter.penalize()
+            raise EmptyResultPage(f"No search results for {title!r}, possibly throttled")
+        limiter.reward()
+        # Extract the first result's link from its anchor tag
+        element = result[0].find_element(By.TAG_NAME, 'a')
+        if not normalize_title(title) == normalize_title(element.text):
+            return None
+        link = element.get_attribute('href')
+        os.write(1, f"paper-based: {link}\n".encode())
+        return link
+
+
+def document_number(url):
+    """
+    Extract the IEEE Xplore document number from a paper URL.
+
+    Args:
+        url (str): A URL, e.g. `https://ieeexplore.ieee.org/document/9123456`.
+
+    Returns:
+        str: The document number, or None if `url` is not an IEEE Xplore paper URL.
+    """
+    if not url or 'ieeexplore.ieee.org' not in url and not url.startswith(IEEE_XPLORE_URL):
+        return None
+    match = _DOCUMENT_NUMBER.search(url)
+    return match.group(1) if match else None
+
+
+def document_url(entry):
+    """
+    Return the IEEE Xplore page of an entry from its `url` or `arnumber` field.
+
+    Entries exported from IEEE Xplore (or by reference managers) often carry
+    these, which makes the title search unnecessary.
+
+    Args:
+        entry (BibEntry): The entry.
+
+    Returns:
+        str: URL of the paper page, or None if the entry does not name one.
+    """
+    number = document_number(entry.get('url'))
+    if number is None:
+        arnumber = (entry.get('arnumber') or '').strip()
+        number = arnumber if arnumber.isdigit() else None
+    return f"{IEEE_XPLORE_URL}/document/{number}" if number else None
+
+
+def fetch_bibtex_http(ieee_url, limiter=None, timeout=30):
+    """
+    Fetch the BibTeX of an IEEE Xplore paper with a plain HTTP request.
+
+    Posts to the citation download endpoint behind the "Cite This" dialog, so
+    neither a browser nor the click-through is needed.
+
+    Args:
+        ieee_url (str): URL of the IEEE paper.
+        limiter (TokenBucket, optional): Rate limiter for the request. Defaults
+            to the process-wide limiter.
+        timeout (float, optional): Seconds to wait for the response. Defaults to 30.
+
+    Returns:
+        str: The BibTeX entry as text, or None if the endpoint returned none.
+    """
+    import urllib.request
+
+    number = document_number(ieee_url)
+    if number is None:
+        return None
+    limiter = limiter or get_rate_limiter()
+    data = urllib.parse.urlencode({'recordIds': number, 'download-format': 'download-bibtex',
+                                   'citations-format': 'citation-only'}).encode()
+    request = urllib.request.Request(f"{IEEE_XPLORE_URL}/xpl/downloadCitations", data=data,
+                                     headers={'User-Agent': USER_AGENT, 'Referer': ieee_url})
+    metrics = get_metrics()
+    with metrics.timer('fetch_http'):
+        metrics.observe('rate_limit_wait', limiter.acquire())
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                text = response.read().decode('utf-8', errors='replace')
+        except OSError:
+            limiter.penalize()
+            raise
+    # The endpoint separates lines with <br> tags and escapes HTML characters
+    bibtex = html.unescape(_LINE_BREAK.sub('\n', text)).strip()
+    if not bibtex.startswith('@'):
+        limiter.penalize()  # Probably a block page instead of BibTeX
+        return None
+    limiter.reward()
+    return bibtex
 
 
 def dismiss_cookie_banner(driver):
@@ -109,6 +368,10 @@ def dismiss_cookie_banner(driver):
     Args:
         driver (WebDriver): The active Selenium WebDriver instance.
     """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     try:
         # Wait up to 5 seconds for the cookie consent banner to appear
         banner = WebDriverWait(driver, 5).until(
@@ -123,7 +386,7 @@ def dismiss_cookie_banner(driver):
         pass
 
 
-def fetch_bibtex(ieee_url):
+def fetch_bibtex(ieee_url, pool=None, limiter=None):
     """
     Fetch the BibTeX entry from an IEEE Xplore paper page.
 
@@ -132,39 +395,69 @@ def fetch_bibtex(ieee_url):
 
     Args:
         ieee_url (str): URL of the IEEE paper.
+        pool (DriverPool, optional): Pool to borrow a browser from. Defaults to
+            the process-wide pool.
+        limiter (TokenBucket, optional): Rate limiter for the page load. Defaults
+            to the process-wide limiter. It backs off when retrieval fails.
 
     Returns:
         str: The BibTeX entry as text, or None if retrieval fails.
     """
-    driver = setup_driver()
-    try:
+    limiter = limiter or get_rate_limiter()
+    metrics = get_metrics()
+    with metrics.timer('fetch'), (pool or get_driver_pool()).driver() as driver:
+        metrics.observe('rate_limit_wait', limiter.acquire())
+        try:
+            bibtex_text = _read_bibtex_dialog(driver, ieee_url)
+        except Exception:
+            limiter.penalize()
+            raise
+        limiter.reward()
+        return bibtex_text
+    return None
+
+
+def _read_bibtex_dialog(driver, ieee_url):
+    """
+    Open a paper page and read the BibTeX text from its "Cite This" dialog.
+    """
+    metrics = get_metrics()
+    with metrics.timer('page_load'):
         driver.get(ieee_url)
-        human_delay(1, 2)  # Allow page to start rendering
+    human_delay(1, 2)  # Allow page to start rendering
+    with metrics.timer('cite_dialog'):
+        return _open_cite_dialog(driver)
 
-        # Dismiss cookie consent banner if it appears
-        dismiss_cookie_banner(driver)
 
-        # Wait until the "Cite This" button is clickable, then click it using JavaScript
-        cite_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CLASS_NAME, 'xpl-btn-secondary'))
-        )
-        driver.execute_script("arguments[0].click();", cite_button)
-        human_delay(2, 3)
+def _open_cite_dialog(driver):
+    """
+    Read the BibTeX text from the "Cite This" dialog of a loaded paper page.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
 
-        # Wait until the BibTeX tab is clickable, then click it
-        bibtex_tab = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, 'a.document-tab-link[title="BibTeX"]'))
-        )
-        driver.execute_script("arguments[0].click();", bibtex_tab)
-        human_delay(2, 3)
+    # Dismiss cookie consent banner if it appears
+    dismiss_cookie_banner(driver)
 
-        # Retrieve the BibTeX text from the designated preformatted text element
-        bibtex_text = driver.find_element(By.CSS_SELECTOR, "pre.text.ris-text").text
-        os.write(1, f"bibtex: {bibtex_text[:10]}\n".encode())
-        return bibtex_text
-    finally:
-        driver.quit()  # Always close the driver to free resources
-    return None
+    # Wait until the "Cite This" button is clickable, then click it using JavaScript
+    cite_button = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.CLASS_NAME, 'xpl-btn-secondary'))
+    )
+    driver.execute_script("arguments[0].click();", cite_button)
+    human_delay(2, 3)
+
+    # Wait until the BibTeX tab is clickable, then click it
+    bibtex_tab = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, 'a.document-tab-link[title="BibTeX"]'))
+    )
+    driver.execute_script("arguments[0].click();", bibtex_tab)
+    human_delay(2, 3)
+
+    # Retrieve the BibTeX text from the designated preformatted text element
+    bibtex_text = driver.find_element(By.CSS_SELECTOR, "pre.text.ris-text").text
+    os.write(1, f"bibtex: {bibtex_text[:10]}\n".encode())
+    return bibtex_text
 
 
 if __name__ == '__main__':
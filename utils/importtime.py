@@ -0,0 +1,68 @@
+import subprocess
+import sys
+
+# Modules that only the checker's browser automation needs.
+HEAVY_MODULES = ('selenium', 'webdriver_manager', 'requests', 'tqdm', 'urllib3')
+
+# Entry points that must stay light, with their cumulative import budget in milliseconds.
+# `checker` and `utils.jobs` are what the Streamlit app imports before its first render.
+BUDGETS = {
+    'cleaner': 150,
+    'checker': 200,
+    'utils.jobs': 100,
+}
+
+
+def measure_import(module):
+    """Imports a module in a fresh interpreter under `-X importtime`.
+
+    Args:
+        module (str): Dotted module name.
+
+    Returns:
+        tuple: `(total_ms, loaded)`, the cumulative import time of `module`
+        and the names of all modules imported along with it.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    total_us, loaded = 0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        loaded.append(name)
+        if name == module:
+            total_us = int(cumulative)
+    return total_us / 1000, loaded
+
+
+def check_import_budgets(budgets=None, heavy=HEAVY_MODULES, runs=3):
+    """Checks that entry points import fast and without the browser stack.
+
+    Args:
+        budgets (dict, optional): Budget in milliseconds per module. Defaults to `BUDGETS`.
+        heavy (iterable, optional): Top-level packages none of them may import.
+        runs (int, optional): Fresh interpreters per module; the fastest counts,
+            as the slower ones mostly measure a busy machine. Defaults to 3.
+
+    Returns:
+        list: Descriptions of the violations; empty if all budgets hold.
+    """
+    problems = []
+    for module, budget in (budgets or BUDGETS).items():
+        total_ms, loaded = min(measure_import(module) for _ in range(runs))
+        print(f"import {module}: {total_ms:.1f} ms (budget {budget} ms)")
+        if total_ms > budget:
+            problems.append(f"import {module} took {total_ms:.1f} ms, over its {budget} ms budget")
+        pulled_in = sorted({name.split('.')[0] for name in loaded} & set(heavy))
+        if pulled_in:
+            problems.append(f"import {module} loads {', '.join(pulled_in)}")
+    return problems
+
+
+if __name__ == '__main__':
+    problems = check_import_budgets()
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,131 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Lifecycle of a job.
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+    """
+    A unit of background work and everything it has published so far.
+
+    The function running the job reports through the job itself: `publish()`
+    for each result as soon as it is known, and `progress()` with the
+    completed fraction (the interface of `st.progress`, so a job can be
+    passed wherever a progress object is expected). It should check
+    `cancel_event` and stop early once it is set.
+    """
+
+    def __init__(self, job_id, description=''):
+        self.id = job_id
+        self.description = description
+        self.status = QUEUED
+        self.fraction = 0.0
+        self.results = []
+        self.output = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.created = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def publish(self, key, value):
+        """
+        Record one intermediate result.
+        """
+        with self._lock:
+            self.results.append((key, value))
+
+    def progress(self, fraction, text=None):
+        """
+        Record the completed fraction of the work.
+        """
+        self.fraction = fraction
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: A consistent copy of the job's state for display.
+        """
+        with self._lock:
+            return {'id': self.id, 'description': self.description, 'status': self.status,
+                    'progress': self.fraction, 'results': list(self.results),
+                    'output': self.output, 'error': self.error}
+
+
+class JobManager:
+    """
+    Runs jobs on a fixed pool of worker threads and keeps them addressable by ID.
+
+    Submitting returns immediately, so callers (e.g. a Streamlit script run)
+    can poll the job instead of blocking on it. Finished jobs are forgotten
+    after `retention` seconds.
+    """
+
+    def __init__(self, max_workers=2, retention=3600):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, description='', **kwargs):
+        """
+        Queue `fn(job, *args, **kwargs)`; its return value becomes `job.output`.
+
+        Returns:
+            str: ID of the new job.
+        """
+        job = Job(uuid.uuid4().hex, description)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_event.is_set():
+            job.status = CANCELLED
+        else:
+            job.status = RUNNING
+            try:
+                job.output = fn(job, *args, **kwargs)
+                job.status = CANCELLED if job.cancel_event.is_set() else DONE
+            except Exception as e:
+                job.error = repr(e)
+                job.status = FAILED
+        job.finished = time.time()
+
+    def _expire(self):
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and now - job.finished > self.retention]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """
+        Returns:
+            Job: The job, or None if the ID is unknown or has expired.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Ask a job to stop. Queued jobs never start; running ones stop at their next check.
+
+        Returns:
+            bool: Whether the job exists and had not finished yet.
+        """
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return False
+        job.cancel_event.set()
+        return True
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            job.cancel_event.set()
+        self._executor.shutdown(wait=True)
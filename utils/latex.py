@@ -0,0 +1,217 @@
+import os
+import re
+
+# Citation commands of LaTeX, natbib, apacite and biblatex that take a key list.
+CITE_COMMANDS = (
+    'cite', 'citep', 'citet', 'citealp', 'citealt', 'citeauthor', 'citeyear', 'citeyearpar',
+    'citeA', 'citeN', 'citeNP', 'citeyearNP', 'citenum', 'citetitle', 'shortcite',
+    'Cite', 'Citep', 'Citet', 'Citealp', 'Citealt', 'Citeauthor',
+    'parencite', 'Parencite', 'autocite', 'Autocite', 'textcite', 'Textcite',
+    'footcite', 'footcitetext', 'smartcite', 'Smartcite', 'supercite', 'fullcite', 'nocite',
+)
+INCLUDE_COMMANDS = ('input', 'include', 'subfile')
+
+# One alternation per file pass: group 1/2 are a citation, group 3/4 an inclusion.
+_SCANNER = re.compile(
+    r'\\(?:(' + '|'.join(sorted(CITE_COMMANDS, key=len, reverse=True)) + r')(?![A-Za-z])\*?'
+    r'(?:\s*\[[^\]]*\]){0,2}\s*\{([^}]*)\}'
+    r'|(' + '|'.join(INCLUDE_COMMANDS) + r')(?![A-Za-z])\s*\{([^}]*)\})'
+)
+# Just the citation commands, with the key list in group 2.
+_CITATION = re.compile(
+    r'(\\(?:' + '|'.join(sorted(CITE_COMMANDS, key=len, reverse=True)) + r')(?![A-Za-z])\*?'
+    r'(?:\s*\[[^\]]*\]){0,2}\s*\{)([^}]*)\}'
+)
+# A `%` after an even number of backslashes (e.g. `\\%`, a line break and then a
+# comment) starts a comment that runs to the end of the line; `\%` is a literal.
+_COMMENT = re.compile(r'((?<!\\)(?:\\\\)*)%[^\n]*')
+
+
+def scan_tex(tex):
+    """Scans LaTeX source once for citations and file inclusions.
+
+    Args:
+        tex (str): LaTeX source.
+
+    Returns:
+        list: `(kind, value, line)` tuples in document order, where `kind` is
+        `'cite'` (value is a single key) or `'include'` (value is the raw
+        argument of `\\input`, `\\include` or `\\subfile`). Commented-out
+        commands are ignored.
+    """
+    tex = _COMMENT.sub(r'\1', tex)
+    events = []
+    line, last = 1, 0
+    for match in _SCANNER.finditer(tex):
+        line += tex.count('\n', last, match.start())
+        last = match.start()
+        if match.group(1):
+            for key in match.group(2).split(','):
+                key = key.strip()
+                if key and key != '*':
+                    events.append(('cite', key, line))
+        else:
+            events.append(('include', match.group(4).strip(), line))
+    return events
+
+
+def rewrite_citations(tex, renames):
+    """Replaces citation keys inside the citation commands of LaTeX source.
+
+    Args:
+        tex (str): LaTeX source.
+        renames (dict): Mapping from old to new citation key.
+
+    Returns:
+        tuple: `(tex, count)`, the rewritten source and the number of keys
+        replaced. A key that becomes a repeat within the same command is dropped.
+    """
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        keys = []
+        for key in match.group(2).split(','):
+            stripped = key.strip()
+            if stripped in renames:
+                count += 1
+                new = renames[stripped]
+                if any(other.strip() == new for other in keys):
+                    continue
+                key = key.replace(stripped, new)
+            keys.append(key)
+        return match.group(1) + ','.join(keys) + '}'
+
+    if not renames:
+        return tex, 0
+    return _CITATION.sub(replace, tex), count
+
+
+def include_candidates(target, current_file, root_dir):
+    """Lists the absolute paths an inclusion command may refer to, in the order they are tried.
+
+    Paths are tried relative to the root document first, as LaTeX does, and
+    then relative to the including file. A missing `.tex` extension is added.
+    """
+    candidates = []
+    for directory in (root_dir, os.path.dirname(current_file)):
+        path = os.path.abspath(os.path.join(directory, target))
+        candidates.extend((path + '.tex', path) if not path.endswith('.tex') else (path,))
+    return candidates
+
+
+def resolve_include(target, current_file, root_dir):
+    """Resolves the argument of an inclusion command to an existing file.
+
+    Args:
+        target (str): Argument of the inclusion command.
+        current_file (str): Path of the file containing the command.
+        root_dir (str): Directory of the root document.
+
+    Returns:
+        str: Absolute path of the included file, or None if it does not exist.
+    """
+    return next((candidate for candidate in include_candidates(target, current_file, root_dir)
+                 if os.path.isfile(candidate)), None)
+
+
+def scan_tex_file(path, root_dir, missing=None):
+    """Reads and scans a single file of a LaTeX project.
+
+    Args:
+        path (str): Path of the .tex file.
+        root_dir (str): Directory of the root document, used to resolve inclusions.
+        missing (dict, optional): If given, every path a missing inclusion could
+            be created at is added to it, mapped to the set of files including it.
+
+    Returns:
+        list: Events as returned by `scan_tex`, with inclusion targets resolved
+        to absolute paths. Inclusions of missing files are dropped with a warning.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        events = scan_tex(f.read())
+
+    resolved = []
+    for kind, value, line in events:
+        if kind == 'include':
+            target = resolve_include(value, path, root_dir)
+            if not target:
+                print(f"Warning: {path}:{line}: cannot find included file '{value}'")
+                if missing is not None:
+                    for candidate in include_candidates(value, path, root_dir):
+                        missing.setdefault(candidate, set()).add(path)
+                continue
+            value = target
+        resolved.append((kind, value, line))
+    return resolved
+
+
+def merge_citations(root, scans):
+    """Merges per-file scans into document order.
+
+    Inclusions are expanded in place, so the order matches the compiled
+    document regardless of the order in which files were scanned.
+
+    Args:
+        root (str): Absolute path of the root document.
+        scans (dict): Mapping from absolute file path to its events.
+
+    Returns:
+        tuple: `(ordered_keys, locations)`, the citation keys without duplicates
+        and a mapping from each key to the `(path, line)` of its first occurrence.
+    """
+    ordered = []
+    locations = {}
+    active = set()
+
+    def visit(path):
+        active.add(path)
+        for kind, value, line in scans.get(path, ()):
+            if kind == 'cite':
+                if value not in locations:
+                    locations[value] = (path, line)
+                    ordered.append(value)
+            elif value not in active:  # Guard against inclusion cycles
+                visit(value)
+        active.discard(path)
+
+    visit(root)
+    return ordered, locations
+
+
+def scan_project(root_tex, max_workers=None, missing=None):
+    """Collects citations from a LaTeX project, following file inclusions.
+
+    Files are read and scanned concurrently as soon as they are discovered.
+
+    Args:
+        root_tex (str): Path of the root .tex file.
+        max_workers (int, optional): Number of scanner threads. Defaults to the
+            `ThreadPoolExecutor` default.
+        missing (dict, optional): Collects the paths of missing inclusions, see `scan_tex_file`.
+
+    Returns:
+        tuple: `(ordered_keys, locations, scans)`, as returned by
+        `merge_citations`, plus the per-file events keyed by absolute path.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED  # Costly to import, see utils.importtime
+
+    root = os.path.abspath(root_tex)
+    root_dir = os.path.dirname(root)
+    scans = {}
+
+    with ThreadPoolExecutor(max_workers) as pool:
+        pending = {pool.submit(scan_tex_file, root, root_dir, missing): root}
+        submitted = {root}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                scans[path] = future.result()
+                for kind, value, _ in scans[path]:
+                    if kind == 'include' and value not in submitted:
+                        submitted.add(value)
+                        pending[pool.submit(scan_tex_file, value, root_dir, missing)] = value
+
+    ordered, locations = merge_citations(root, scans)
+    return ordered, locations, scans
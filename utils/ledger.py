@@ -0,0 +1,113 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from utils.bib import BibEntry
+
+DEFAULT_LEDGER_PATH = os.environ.get(
+    'BIBTEX_LEDGER', os.path.join(os.path.expanduser('~'), '.cache', 'bibtex-clean-tool', 'ledger.sqlite3'))
+
+# Outcomes of checking an entry.
+UPDATED, CONFIRMED, NOT_FOUND, FAILED = 'updated', 'confirmed', 'not_found', 'failed'
+
+
+def entry_hash(entry):
+    """
+    Return the content hash that identifies an entry (key included) in the ledger.
+    """
+    return hashlib.blake2b(entry.strip().encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _squeeze(value):
+    return ' '.join(value.split()) if value is not None else None
+
+
+def field_changes(before, after):
+    """
+    Compare two versions of an entry field by field.
+
+    Args:
+        before (str): The entry as it was.
+        after (str): The entry as checked.
+
+    Returns:
+        dict: Maps each added, removed or modified field to `{"old": ..., "new": ...}`,
+        with None for a missing side. Differences in whitespace only are
+        ignored. The entry type and key are reported as `@type` and `@key`
+        when they differ.
+    """
+    old, new = BibEntry.from_text(before), BibEntry.from_text(after)
+    changes = {}
+    for name, old_value, new_value in (('@type', old.entry_type, new.entry_type), ('@key', old.key, new.key)):
+        if old_value != new_value:
+            changes[name] = {'old': old_value, 'new': new_value}
+    old_fields, new_fields = old.fields(), new.fields()
+    for name in {**old_fields, **new_fields}:
+        if _squeeze(old_fields.get(name)) != _squeeze(new_fields.get(name)):
+            changes[name] = {'old': old_fields.get(name), 'new': new_fields.get(name)}
+    return changes
+
+
+class VerificationLedger:
+    """
+    A persistent SQLite record of which entries have been checked.
+
+    Entries are identified by the hash of their text, so an entry that has
+    not been edited since it was last checked is recognised in any
+    bibliography and its earlier outcome and result can be reused instead
+    of checking it again.
+    """
+
+    def __init__(self, path=DEFAULT_LEDGER_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Written from the checker's main thread, read by the Streamlit app's job threads.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS verified '
+                '(hash TEXT PRIMARY KEY, key TEXT, outcome TEXT NOT NULL, result TEXT NOT NULL, verified REAL NOT NULL)')
+
+    def get(self, entry, max_age=None):
+        """
+        Look up the last check of an entry.
+
+        Args:
+            entry (str): The entry as it is now.
+            max_age (float, optional): Ignore checks older than this many seconds.
+
+        Returns:
+            tuple: `(outcome, result, verified)` with the checked entry and the
+            time of the check, or None if this version of the entry has not been
+            checked (recently enough).
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT outcome, result, verified FROM verified WHERE hash = ?',
+                                     (entry_hash(entry),)).fetchone()
+        if row is None or max_age is not None and time.time() - row[2] > max_age:
+            return None
+        return row
+
+    def record(self, checks):
+        """
+        Store the outcomes of checking entries, in one transaction.
+
+        Args:
+            checks (iterable): `(key, entry, outcome, result)` tuples: the citation
+                key (for inspecting the ledger), the entry as it was checked, one of
+                `UPDATED`, `CONFIRMED`, `NOT_FOUND` and `FAILED`, and the entry
+                written to the output.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO verified VALUES (?, ?, ?, ?, ?)',
+                                   [(entry_hash(entry), key, outcome, result, now)
+                                    for key, entry, outcome, result in checks])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
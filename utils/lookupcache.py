@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    'BIBTEX_LOOKUP_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'bibtex-clean-tool', 'lookups.sqlite3'))
+
+# Returned by the getters when nothing usable is cached, as opposed to a cached "not found" (None).
+MISSING = object()
+
+_TABLES = ('searches', 'bibtex')
+
+
+class LookupCache:
+    """
+    A persistent SQLite cache for IEEE Xplore lookups.
+
+    Two tables are kept: normalized title -> search result URL, and
+    URL -> fetched BibTeX. A value of NULL records that nothing was found
+    (negative caching). Positive results expire after `ttl` seconds and
+    negative ones after `negative_ttl` seconds; each table is trimmed to
+    `max_entries` rows by evicting the least recently used ones.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=30 * 24 * 3600, negative_ttl=24 * 3600, max_entries=50000):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Shared by the checker's worker threads, so access is serialized with a lock.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            for table in _TABLES:
+                self._conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} '
+                    '(key TEXT PRIMARY KEY, value TEXT, stored REAL NOT NULL, used REAL NOT NULL)')
+                self._conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_used ON {table} (used)')
+
+    def _get(self, table, key, allow_stale):
+        with self._lock, self._conn:
+            row = self._conn.execute(f'SELECT value, stored FROM {table} WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return MISSING
+            value, stored = row
+            now = time.time()
+            if not allow_stale and now - stored > (self.ttl if value is not None else self.negative_ttl):
+                return MISSING
+            self._conn.execute(f'UPDATE {table} SET used = ? WHERE key = ?', (now, key))
+            return value
+
+    def _put(self, table, key, value):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(f'INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?)', (key, value, now, now))
+            count = self._conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    f'DELETE FROM {table} WHERE key IN (SELECT key FROM {table} ORDER BY used LIMIT ?)',
+                    (count - self.max_entries,))
+
+    def get_search(self, title, allow_stale=False):
+        """
+        Look up the search result URL for a normalized title.
+
+        Args:
+            title (str): Normalized title (see `utils.bib.normalize_title`).
+            allow_stale (bool, optional): Ignore expiry, e.g. when working offline.
+
+        Returns:
+            str | None | object: The URL, None if it is known that nothing was
+            found, or `MISSING` if there is no usable cached answer.
+        """
+        return self._get('searches', title, allow_stale)
+
+    def put_search(self, title, url):
+        """
+        Store the search result URL (or None for "not found") for a normalized title.
+        """
+        self._put('searches', title, url)
+
+    def get_bibtex(self, url, allow_stale=False):
+        """
+        Look up the BibTeX fetched from a paper URL. Returns like `get_search`.
+        """
+        return self._get('bibtex', url, allow_stale)
+
+    def put_bibtex(self, url, bibtex):
+        """
+        Store the BibTeX (or None for "not found") fetched from a paper URL.
+        """
+        self._put('bibtex', url, bibtex)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
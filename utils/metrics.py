@@ -0,0 +1,180 @@
+import bisect
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds of the latency histogram buckets; the last bucket is open-ended.
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+# Samples kept per stage for the percentiles; beyond this they are a uniform random sample.
+RESERVOIR_SIZE = 10000
+
+
+class _StageStats:
+    """Exact count, total, max and histogram of one stage, plus a bounded sample of its latencies."""
+
+    __slots__ = ('count', 'total', 'max', 'histogram', 'reservoir')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+        self.reservoir = []
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.histogram[bisect.bisect_left(BUCKETS, seconds)] += 1
+        if len(self.reservoir) < RESERVOIR_SIZE:
+            self.reservoir.append(seconds)
+        else:  # Reservoir sampling keeps every sample with the same probability
+            import random  # Only needed by long runs, see utils.importtime
+
+            slot = random.randrange(self.count)
+            if slot < RESERVOIR_SIZE:
+                self.reservoir[slot] = seconds
+
+
+class Metrics:
+    """
+    Thread-safe timers and counters for the stages of a run.
+
+    Count, total, max and the latency histogram of every timed stage are
+    exact. Percentiles are computed from at most `RESERVOIR_SIZE` samples per
+    stage, so memory stays bounded in long-lived processes such as the app,
+    which checks bibliographies one after another without resetting.
+    """
+
+    def __init__(self):
+        self._samples = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    @contextmanager
+    def timer(self, stage):
+        """
+        Time a `with` block as one sample of `stage`, also if it raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        """
+        Record one latency sample of `stage` measured elsewhere.
+        """
+        with self._lock:
+            stats = self._samples.get(stage)
+            if stats is None:
+                stats = self._samples[stage] = _StageStats()
+            stats.add(seconds)
+
+    def count(self, name, amount=1):
+        """
+        Increment the counter `name`.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+    def report(self):
+        """
+        Summarize everything recorded so far.
+
+        Returns:
+            dict: `stages` maps each stage to its sample count, total, mean,
+            p50/p90/p99 and max in seconds plus a `histogram` of counts per
+            bucket of `BUCKETS` (keyed by upper bound, `"inf"` for the rest);
+            `counters` holds the counters. Percentiles are estimates once a
+            stage has more than `RESERVOIR_SIZE` samples.
+        """
+        with self._lock:
+            samples = {stage: (stats.count, stats.total, stats.max, list(stats.histogram), sorted(stats.reservoir))
+                       for stage, stats in self._samples.items()}
+            counters = dict(self._counters)
+
+        stages = {}
+        for stage, (count, total, longest, histogram, values) in samples.items():
+            stages[stage] = {
+                'count': count,
+                'total': total,
+                'mean': total / count,
+                'p50': _percentile(values, 50),
+                'p90': _percentile(values, 90),
+                'p99': _percentile(values, 99),
+                'max': longest,
+                'histogram': dict(zip([str(bound) for bound in BUCKETS] + ['inf'], histogram)),
+            }
+        return {'started': self.started, 'elapsed': time.time() - self.started,
+                'stages': stages, 'counters': counters}
+
+    def write(self, path):
+        """
+        Export the report as CSV if `path` ends in `.csv`, as JSON otherwise.
+        """
+        report = self.report()
+        if path.endswith('.csv'):
+            import csv
+
+            buckets = [str(bound) for bound in BUCKETS] + ['inf']
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['name', 'kind', 'count', 'total', 'mean', 'p50', 'p90', 'p99', 'max']
+                                + [f'le_{bucket}' for bucket in buckets])
+                for stage, summary in sorted(report['stages'].items()):
+                    writer.writerow([stage, 'timer', summary['count']]
+                                    + [f"{summary[field]:.6f}" for field in ('total', 'mean', 'p50', 'p90', 'p99', 'max')]
+                                    + [summary['histogram'][bucket] for bucket in buckets])
+                for name, value in sorted(report['counters'].items()):
+                    writer.writerow([name, 'counter', value])
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        print(f"Metrics saved as {path}")
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending, non-empty list."""
+    return sorted_values[max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)]
+
+
+_default_metrics = Metrics()
+
+
+def get_metrics():
+    """
+    Return the process-wide metrics that the cleaner and checker stages record into.
+    """
+    return _default_metrics
+
+
+@contextmanager
+def profiled(path=None):
+    """
+    Run a `with` block under cProfile and dump the stats to `path`
+    (readable with `python -m pstats`). Does nothing without a path.
+    """
+    if not path:
+        yield
+        return
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"Profile saved as {path}")
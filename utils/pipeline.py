@@ -0,0 +1,141 @@
+import queue
+import threading
+import time
+
+from utils.metrics import get_metrics
+
+_DONE = object()  # Sent down a queue once per worker when its producers are finished
+
+
+class Stage:
+    """
+    One step of a pipeline: `fn(item)` runs in `workers` threads and returns
+    the item to hand to the next stage.
+    """
+
+    def __init__(self, name, fn, workers=1):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.count = 0
+        self.busy = 0.0
+        self.first = None
+        self.last = None
+
+    def summary(self):
+        """
+        Returns:
+            str: Items handled, throughput and how busy the stage's workers were.
+        """
+        if not self.count:
+            return f"{self.name}: 0 items"
+        elapsed = max(self.last - self.first, 1e-9)
+        return (f"{self.name}: {self.count} items in {elapsed:.1f}s, {self.count / elapsed:.2f}/s, "
+                f"{self.busy / (elapsed * self.workers):.0%} busy")
+
+
+def run_pipeline(items, stages, queue_size=2, cancel=None):
+    """
+    Stream items through stages that run concurrently.
+
+    Each stage has its own worker threads and takes its input from a bounded
+    queue, so a slow stage holds back the ones before it instead of letting
+    work pile up, while the stages after it keep working on earlier items.
+    Every stage records a `stage_<name>` timer in the metrics; the throughput
+    of each is printed once all items are through.
+
+    Args:
+        items (iterable): Inputs of the first stage, consumed lazily.
+        stages (list): `Stage`s, in order.
+        queue_size (int, optional): Capacity of the queue in front of each stage. Defaults to 2.
+        cancel (threading.Event, optional): Once set, no further items are
+            taken from `items`; those already in the pipeline still finish.
+
+    Yields:
+        The outputs of the last stage, in completion order.
+
+    Raises:
+        Exception: The first exception raised by a stage function, after
+            the pipeline has been shut down.
+    """
+    queues = [queue.Queue(queue_size) for _ in stages] + [queue.Queue(queue_size)]
+    closing = threading.Event()  # Set when the consumer stops early or a stage failed
+    remaining = [stage.workers for stage in stages]
+    errors = []
+    lock = threading.Lock()
+    metrics = get_metrics()
+
+    def put(q, item):
+        while not closing.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def get(q):
+        while not closing.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def feed():
+        try:
+            for item in items:
+                if closing.is_set() or cancel is not None and cancel.is_set():
+                    break
+                put(queues[0], item)
+        except Exception as e:
+            errors.append(e)
+            closing.set()
+        for _ in range(stages[0].workers):
+            put(queues[0], _DONE)
+
+    def work(i, stage):
+        while True:
+            item = get(queues[i])
+            if item is _DONE:
+                break
+            start = time.perf_counter()
+            try:
+                item = stage.fn(item)
+            except Exception as e:
+                errors.append(e)
+                closing.set()
+                break
+            end = time.perf_counter()
+            metrics.observe(f'stage_{stage.name}', end - start)
+            with lock:
+                stage.count += 1
+                stage.busy += end - start
+                stage.first = start if stage.first is None else min(stage.first, start)
+                stage.last = end if stage.last is None else max(stage.last, end)
+            put(queues[i + 1], item)
+        with lock:
+            remaining[i] -= 1
+            last = remaining[i] == 0
+        if last:  # The next stage gets one marker per worker, the consumer a single one
+            for _ in range(stages[i + 1].workers if i + 1 < len(stages) else 1):
+                put(queues[i + 1], _DONE)
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    threads += [threading.Thread(target=work, args=(i, stage), daemon=True)
+                for i, stage in enumerate(stages) for _ in range(stage.workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            item = get(queues[-1])
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        closing.set()  # Unblocks every thread if the consumer stopped early
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    for stage in stages:
+        print(stage.summary())
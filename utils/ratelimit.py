@@ -0,0 +1,63 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket shared by everything that loads pages.
+
+    Each `acquire()` takes one token and blocks until it is available, so all
+    callers together stay below `rate` requests per second (plus `burst`).
+
+    The rate adapts AIMD-style: `penalize()` multiplies it by `backoff` when a
+    request failed or came back suspiciously empty, and `reward()` adds back a
+    tenth of the configured rate after each success.
+    """
+
+    def __init__(self, rate=0.5, burst=1, min_rate=0.05, backoff=0.5):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.backoff = backoff
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Take one token, sleeping until it is available.
+
+        Tokens may go negative: each caller reserves the next free slot, so
+        waiting threads are served in arrival order.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self):
+        """
+        Slow down after an error or an empty response.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+
+    def reward(self):
+        """
+        Speed back up towards the configured rate after a success.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
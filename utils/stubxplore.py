@@ -0,0 +1,226 @@
+import html
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+
+from utils.bib import BibEntry, normalize_title, parse_bib_file
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(ROOT_DIR, 'fixtures', 'xplore')
+
+_DOCUMENT_PATH = re.compile(r'^/document/(\d+)/?$')
+
+
+def load_fixtures(fixture_dir=FIXTURE_DIR):
+    """Reads the fixture papers and page templates.
+
+    Args:
+        fixture_dir (str, optional): Directory with `papers.json` and the
+            `search.html`, `result.html` and `document.html` templates.
+
+    Returns:
+        tuple: `(papers, templates)`, the list of paper dicts and a mapping from
+        template name to `string.Template`.
+    """
+    with open(os.path.join(fixture_dir, 'papers.json'), 'r', encoding='utf-8') as f:
+        papers = json.load(f)
+    templates = {}
+    for name in ('search', 'result', 'document'):
+        with open(os.path.join(fixture_dir, name + '.html'), 'r', encoding='utf-8') as f:
+            templates[name] = Template(f.read())
+    return papers, templates
+
+
+class StubXplore:
+    """
+    A local stand-in for IEEE Xplore and the DOI resolver that serves fixture pages.
+
+    It answers the title search, the paper pages with their "Cite This"
+    dialog, the citation download endpoint and DOI redirects, the way the
+    checker uses them. Point the checker at it with the `IEEE_XPLORE_URL`
+    and `DOI_RESOLVER_URL` environment variables (see `environ`). Papers
+    with `"citation_endpoint": false` get a block page from the download
+    endpoint, so their BibTeX can only be read through the browser.
+    """
+
+    def __init__(self, fixture_dir=FIXTURE_DIR):
+        self.papers, self.templates = load_fixtures(fixture_dir)
+        self.requests = []  # (method, path) of every request served
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                stub.requests.append(('GET', self.path))
+                status, headers, body = stub.respond(self.path)
+                self.send(status, headers, body)
+
+            def do_HEAD(self):
+                stub.requests.append(('HEAD', self.path))
+                status, headers, _ = stub.respond(self.path)
+                self.send(status, headers, b'')
+
+            def do_POST(self):
+                stub.requests.append(('POST', self.path))
+                form = urllib.parse.parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+                status, headers, body = stub.download_citation(self.path, form)
+                self.send(status, headers, body)
+
+            def send(self, status, headers, body):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}'
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def environ(self):
+        """Returns the environment variables that point the checker at the stub."""
+        return {'IEEE_XPLORE_URL': self.url, 'DOI_RESOLVER_URL': self.url + '/doi'}
+
+    def paper(self, number):
+        return next((paper for paper in self.papers if paper['number'] == number), None)
+
+    def respond(self, path):
+        """Returns `(status, headers, body)` for a GET or HEAD request."""
+        parsed = urllib.parse.urlsplit(path)
+        if parsed.path == '/search/searchresult.jsp':
+            query = urllib.parse.parse_qs(parsed.query).get('queryText', [''])[0]
+            results = [self.templates['result'].substitute(number=paper['number'], title=html.escape(paper['title']))
+                       for paper in self.papers if normalize_title(paper['title']) == normalize_title(query)]
+            return self._html(self.templates['search'].substitute(results='\n'.join(results)))
+
+        match = _DOCUMENT_PATH.match(parsed.path)
+        if match and self.paper(match.group(1)):
+            paper = self.paper(match.group(1))
+            return self._html(self.templates['document'].substitute(title=html.escape(paper['title']),
+                                                                     bibtex=html.escape(paper['bibtex'])))
+
+        if parsed.path.startswith('/doi/'):
+            doi = urllib.parse.unquote(parsed.path[len('/doi/'):]).lower()
+            paper = next((paper for paper in self.papers if paper['doi'].lower() == doi), None)
+            if paper:
+                return 302, {'Location': f"{self.url}/document/{paper['number']}/"}, b''
+        return 404, {}, b''
+
+    def download_citation(self, path, form):
+        """Answers the citation download endpoint like IEEE Xplore: `<br>` line breaks, HTML-escaped."""
+        paper = self.paper(form.get('recordIds', [''])[0])
+        if path != '/xpl/downloadCitations' or paper is None or paper.get('citation_endpoint') is False:
+            return self._html('<html><body>Request Rejected</body></html>')
+        body = '<br>'.join(html.escape(line, quote=False) for line in paper['bibtex'].split('\n')) + '<br>'
+        return 200, {'Content-Type': 'text/plain; charset=utf-8'}, body.encode('utf-8')
+
+    @staticmethod
+    def _html(page):
+        return 200, {'Content-Type': 'text/html; charset=utf-8'}, page.encode('utf-8')
+
+
+def fixture_entries(papers, use_browser):
+    """Builds the entries of the check's .bib file and what each should become.
+
+    Returns:
+        list: `(key, entry, paper)` tuples, with `paper` None for entries that
+        should be left unchanged.
+    """
+    by_url, by_arnumber, by_doi = papers[0], papers[1], papers[0]
+    entries = [
+        ('byUrl', f"@article{{byUrl,\n  title = {{Old title}},\n  url = {{https://ieeexplore.ieee.org/document/{by_url['number']}}}\n}}", by_url),
+        ('byArnumber', f"@article{{byArnumber,\n  title = {{Old title}},\n  arnumber = {{{by_arnumber['number']}}}\n}}", by_arnumber),
+        ('byDoi', f"@article{{byDoi,\n  title = {{Old title}},\n  doi = {{https://doi.org/{by_doi['doi']}}}\n}}", by_doi),
+    ]
+    if use_browser:
+        dialog_only = next(paper for paper in papers if paper.get('citation_endpoint') is False)
+        entries += [
+            ('byTitle', f"@article{{byTitle,\n  title = {{{papers[1]['title']}}},\n  year = {{2020}}\n}}", papers[1]),
+            ('citeDialog', f"@article{{citeDialog,\n  title = {{Old title}},\n  arnumber = {{{dialog_only['number']}}}\n}}",
+             dialog_only),
+            ('unknown', "@article{unknown,\n  title = {A Paper That Is Not in Xplore},\n  year = {2019}\n}", None),
+        ]
+    return entries
+
+
+def run_check(use_browser=None, fixture_dir=FIXTURE_DIR):
+    """Runs `checker.py` on a fixture bibliography against a `StubXplore`.
+
+    Args:
+        use_browser (bool, optional): Also check the title search and the "Cite
+            This" dialog, which need Selenium and Chrome. Defaults to whether
+            Selenium is installed.
+        fixture_dir (str, optional): Directory of the fixtures, see `load_fixtures`.
+
+    Returns:
+        list: Descriptions of the problems found; empty if the checker updated
+        every entry as expected.
+    """
+    if use_browser is None:
+        use_browser = importlib.util.find_spec('selenium') is not None
+
+    problems = []
+    with StubXplore(fixture_dir) as stub, tempfile.TemporaryDirectory() as tmp_dir:
+        entries = fixture_entries(stub.papers, use_browser)
+        with open(os.path.join(tmp_dir, 'fixture.bib'), 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join(entry for _, entry, _ in entries))
+
+        result = subprocess.run([sys.executable, os.path.join(ROOT_DIR, 'checker.py'), 'fixture.bib',
+                                 '--num', str(len(entries)), '--rate', '100', '--no-lookup-cache', '--no-ledger'],
+                                cwd=tmp_dir, env={**os.environ, **stub.environ()}, capture_output=True, text=True)
+        if result.returncode != 0:
+            return [f"checker.py exited with {result.returncode}:\n{result.stderr}"]
+        updated = parse_bib_file(os.path.join(tmp_dir, 'updated_fixture.bib'), False)
+
+        for key, entry, paper in entries:
+            if key not in updated:
+                problems.append(f"{key}: missing from the output")
+            elif paper is None:
+                if updated[key].strip() != entry.strip():
+                    problems.append(f"{key}: should be unchanged, got\n{updated[key]}")
+            else:
+                expected = BibEntry.from_text(paper['bibtex'])
+                expected.set_key(key)  # The checker keeps the original key
+                if updated[key] != expected.text:
+                    problems.append(f"{key}: expected the BibTeX of {paper['number']}, got\n{updated[key]}")
+        if not use_browser and any(path.startswith('/search/') for _, path in stub.requests):
+            problems.append("Entries with a URL, arnumber or IEEE DOI were searched by title")
+    return problems
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the checker against a local stub of IEEE Xplore serving fixture pages.')
+    parser.add_argument('--browser', action='store_true', default=None,
+                        help='Also check the title search and "Cite This" dialog (default: if Selenium is installed)')
+    parser.add_argument('--no-browser', dest='browser', action='store_false', help='Only check the plain HTTP paths')
+    args = parser.parse_args()
+
+    use_browser = args.browser if args.browser is not None else importlib.util.find_spec('selenium') is not None
+    print(f"Checking {'the browser and ' if use_browser else ''}plain HTTP paths against the stub")
+    problems = run_check(use_browser)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK: every fixture entry was updated as expected")
@@ -1,40 +1,160 @@
-import regex as re  # Requires installation: pip install regex
+import re
+from functools import lru_cache
 
-def remove_textcolor(input_path, output_path, color="red"):
+# Review markup that can be stripped. Colored commands only match the requested colors.
+REVIEW_COMMANDS = ('textcolor', 'color', 'hl', 'added', 'deleted', 'replaced')
+
+# Kinds of open brace groups on the scanner stack.
+_KEEP, _UNWRAP, _DELETE, _REPLACED = range(4)
+
+_OPTIONAL = r'\s*(?:\[[^\]]*\])?\s*'
+_COLOR_ARG = re.compile(_OPTIONAL + r'\{\s*([^{}]*?)\s*\}')
+_COLORED_BODY = re.compile(_OPTIONAL + r'\{\s*([^{}]*?)\s*\}\s*\{')
+_BODY = re.compile(_OPTIONAL + r'\{')
+_NEXT_GROUP = re.compile(r'\s*\{')
+
+
+@lru_cache(maxsize=None)
+def _token_patterns(commands):
+    """Patterns for the only tokens the scanner has to look at.
+
+    Braces only matter while a stripped group is open, so outside of one the
+    scanner skips straight to the next command, escape or comment.
     """
-    Processes a LaTeX file by replacing all occurrences of \textcolor{red}{...}
-    with the inner content, correctly handling nested braces.
+    names = '|'.join(sorted(commands, key=len, reverse=True))
+    command = r'\\(?P<cmd>' + names + r')(?![A-Za-z])'
+    return (re.compile(command + r'|\\[\\%]|%[^\n]*'),
+            re.compile(command + r'|\\.|%[^\n]*|[{}]', re.DOTALL))
 
-    Args:
-        input_path (str): Path to the input .tex file.
-        output_path (str): Path to the output .tex file.
+
+def strip_review_markup(text, colors=('red',), commands=('textcolor',), write=None):
     """
-    # Read file content
-    with open(input_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    print(f"Loaded content from {input_path} (length: {len(content)} characters)")
+    Removes review markup from LaTeX source in a single pass.
+
+    Braces are tracked on a stack, so nested and interleaved markup is handled
+    without re-scanning the document:
 
-    # Define a recursive pattern to match balanced braces.
-    # (?P<braced>\{(?:[^{}]+|(?P>braced))*\}) matches nested curly braces.
-    pattern = r'\\textcolor\{' + color+ r'\}(?P<braced>\{(?:[^{}]+|(?P>braced))*\})'
+    - `\\textcolor{c}{...}` and `\\hl{...}`, `\\added{...}` keep their content.
+    - `\\color{c}` switches are dropped, leaving the surrounding group.
+    - `\\deleted{...}` is removed together with its content.
+    - `\\replaced{new}{old}` keeps `new` only.
+
+    Escaped characters and comments are copied verbatim.
+
+    Args:
+        text (str): LaTeX source.
+        colors (str | iterable, optional): Colors whose `\\textcolor`/`\\color`
+            markup is removed. Defaults to red.
+        commands (iterable, optional): Which of `REVIEW_COMMANDS` to strip.
+            Defaults to `\\textcolor` only.
+        write (callable, optional): Receives the output piece by piece, e.g.
+            `file.write`. If omitted, the output is returned as a string.
 
-    def repl(match):
-        """Replacement function that removes the outermost braces."""
-        braced = match.group('braced')
-        return braced[1:-1]  # Remove the outermost braces
+    Returns:
+        tuple: `(output, counts)`, where `output` is None when `write` is given
+        and `counts` maps each command to the number of removals.
+    """
+    colors = {colors} if isinstance(colors, str) else set(colors)
+    commands = tuple(sorted(set(commands)))
+    counts = dict.fromkeys(commands, 0)
+    pieces = [] if write is None else None
+    emit = pieces.append if write is None else write
 
-    total_subs = 0
-    # Loop replacements until no further substitutions are made.
+    toplevel_re, group_re = _token_patterns(commands)
+    stack = []
+    deleting = 0  # Number of open `\deleted`-like groups; nothing is emitted inside them
+    pos = 0
     while True:
-        content, num_subs = re.subn(pattern, repl, content)
-        total_subs += num_subs
-        print(f"Iteration substitution count: {num_subs}")
-        if num_subs == 0:
+        match = (group_re if stack else toplevel_re).search(text, pos)
+        end = match.start() if match else len(text)
+        if not deleting and end > pos:
+            emit(text[pos:end])
+        if not match:
             break
+        token = match.group()
+        pos = match.end()
+        command = match.group('cmd')
+
+        if token == '{':
+            stack.append(_KEEP)
+        elif token == '}':
+            kind = stack.pop() if stack else _KEEP
+            if kind == _DELETE:
+                deleting -= 1
+                continue
+            if kind == _REPLACED:
+                old = _NEXT_GROUP.match(text, pos)
+                if old:  # The second argument holds the replaced text
+                    pos = old.end()
+                    stack.append(_DELETE)
+                    deleting += 1
+                continue
+            if kind == _UNWRAP:
+                continue
+        elif command == 'textcolor':
+            arg = _COLORED_BODY.match(text, pos)
+            if arg and arg.group(1) in colors:
+                counts[command] += 1
+                pos = arg.end()
+                stack.append(_UNWRAP)
+                continue
+        elif command == 'color':
+            arg = _COLOR_ARG.match(text, pos)
+            if arg and arg.group(1) in colors:
+                counts[command] += 1
+                pos = arg.end()
+                continue
+        elif command:
+            arg = _BODY.match(text, pos)
+            if arg:
+                counts[command] += 1
+                pos = arg.end()
+                if command == 'deleted':
+                    stack.append(_DELETE)
+                    deleting += 1
+                else:
+                    stack.append(_REPLACED if command == 'replaced' else _UNWRAP)
+                continue
+
+        if not deleting:
+            emit(token)
+
+    return (''.join(pieces) if pieces is not None else None), counts
+
+
+def remove_textcolor(input_path, output_path, color="red", commands=('textcolor',)):
+    """
+    Processes a LaTeX file by replacing all occurrences of \\textcolor{red}{...}
+    with the inner content, correctly handling nested braces.
+
+    Args:
+        input_path (str | TextIO): Path to the input .tex file, or a readable text stream.
+        output_path (str | TextIO): Path to the output .tex file (may be the input
+            file), or a writable text stream.
+        color (str | iterable, optional): Color or colors to remove. Defaults to red.
+        commands (iterable, optional): Review commands to strip, see
+            `strip_review_markup`. Defaults to `\\textcolor` only.
+
+    Returns:
+        dict: Number of removals per command.
+    """
+    # Read file content
+    if hasattr(input_path, 'read'):
+        content = input_path.read()
+    else:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    print(f"Loaded content from {getattr(input_path, 'name', input_path)} (length: {len(content)} characters)")
 
-    print(f"Total substitutions performed: {total_subs}")
+    # Stream the processed content straight into the output
+    if hasattr(output_path, 'write'):
+        _, counts = strip_review_markup(content, color, commands, write=output_path.write)
+    else:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            _, counts = strip_review_markup(content, color, commands, write=f.write)
 
-    # Write the processed content to the output file
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(content)
-    print(f"Processed content written to {output_path}")
\ No newline at end of file
+    for command, count in counts.items():
+        print(f"Removed \\{command}: {count}")
+    print(f"Total substitutions performed: {sum(counts.values())}")
+    print(f"Processed content written to {getattr(output_path, 'name', output_path)}")
+    return counts
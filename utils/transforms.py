@@ -0,0 +1,147 @@
+import re
+
+# Fields that reference managers export but bibliography styles never print;
+# abstracts alone often make up most of a .bib exported from Zotero or Google Scholar.
+HEAVY_FIELDS = ('abstract', 'keywords', 'file', 'note', 'annote', 'mendeley-tags')
+
+# Word abbreviations for venue names, following ISO 4, which also omits articles,
+# prepositions and conjunctions.
+VENUE_ABBREVIATIONS = {
+    'proceedings': 'Proc.', 'transactions': 'Trans.', 'international': 'Int.', 'conference': 'Conf.',
+    'journal': 'J.', 'symposium': 'Symp.', 'annual': 'Annu.', 'advances': 'Adv.', 'analysis': 'Anal.',
+    'computer': 'Comput.', 'computing': 'Comput.', 'science': 'Sci.', 'engineering': 'Eng.',
+    'communications': 'Commun.', 'information': 'Inf.', 'technology': 'Technol.', 'systems': 'Syst.',
+    'networks': 'Netw.', 'networking': 'Netw.', 'processing': 'Process.', 'applications': 'Appl.',
+    'intelligence': 'Intell.', 'intelligent': 'Intell.', 'artificial': 'Artif.', 'vehicular': 'Veh.',
+    'letters': 'Lett.', 'magazine': 'Mag.', 'research': 'Res.', 'society': 'Soc.', 'acoustics': 'Acoust.',
+    'security': 'Secur.', 'vision': 'Vis.', 'recognition': 'Recognit.', 'learning': 'Learn.',
+    'machine': 'Mach.', 'automation': 'Autom.', 'robotics': 'Robot.', 'review': 'Rev.',
+    'electronics': 'Electron.', 'association': 'Assoc.', 'vibration': 'Vib.', 'acoustical': 'Acoust.',
+    'america': 'Am.', 'american': 'Am.', 'european': 'Eur.', 'physics': 'Phys.', 'mathematics': 'Math.',
+}
+VENUE_OMITTED = {'of', 'on', 'the', 'for', 'in', 'and'}
+VENUE_FIELDS = ('journal', 'booktitle')
+_VENUE_WORD = re.compile(r'(?<![\\A-Za-z])[A-Za-z]+')  # Not LaTeX command names
+_WHITESPACE = re.compile(r'\s+')
+_BRACE = re.compile(r'(?<!\\)[{}]')  # Not escaped \{ or \}
+
+_registry = {}
+
+
+def register_transform(name):
+    """Registers a field transform under `name`, e.g. for `--transform` on the command line.
+
+    A field transform is called as `fn(name, value)` for every field of every
+    entry, with the lowercase field name and its raw value (without the
+    enclosing braces or quotes), and returns the new value, or None to drop
+    the field.
+
+    Args:
+        name (str): Name to register the transform under.
+
+    Returns:
+        function: A decorator registering and returning the transform.
+    """
+    def register(fn):
+        _registry[name] = fn
+        return fn
+    return register
+
+
+def get_transform(name):
+    """Returns the field transform registered under `name`.
+
+    Raises:
+        ValueError: If no transform has that name.
+    """
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"Unknown transform {name!r} (known: {', '.join(sorted(_registry))})") from None
+
+
+def transform_names():
+    return sorted(_registry)
+
+
+def drop_fields(*names):
+    """Returns a transform that removes the given fields."""
+    names = frozenset(name.lower() for name in names)
+
+    def drop(name, value):
+        return None if name in names else value
+    return drop
+
+
+def chain(transforms):
+    """Combines transforms into one, so that each field is rewritten in a single pass.
+
+    Args:
+        transforms (iterable): Transforms, or names of registered ones, applied in order.
+            A field dropped by one is not passed to the rest.
+
+    Returns:
+        function: The combined transform, or None if there are no transforms.
+    """
+    transforms = [get_transform(t) if isinstance(t, str) else t for t in transforms]
+    if not transforms:
+        return None
+    if len(transforms) == 1:
+        return transforms[0]
+
+    def combined(name, value):
+        for transform in transforms:
+            value = transform(name, value)
+            if value is None:
+                return None
+        return value
+    return combined
+
+
+register_transform('minify')(drop_fields(*HEAVY_FIELDS))
+
+
+@register_transform('wrap-title')
+def wrap_title(name, value):
+    """Wraps the first word of the title in `\\text{}` (see `cleaner.wrap_first_word_in_title`)."""
+    if name != 'title' or not value or value[0].isspace():
+        return value
+    word = value.split(None, 1)[0]
+    return '\\text{' + word + '}' + value[len(word):]
+
+
+@register_transform('squeeze')
+def squeeze_whitespace(name, value):
+    """Collapses line breaks and runs of spaces in a value into single spaces."""
+    return _WHITESPACE.sub(' ', value).strip()
+
+
+@register_transform('abbreviate-venues')
+def abbreviate_venue(name, value):
+    """Abbreviates journal and proceedings names with `VENUE_ABBREVIATIONS`, dropping `VENUE_OMITTED` words.
+
+    Text in braces is protected in BibTeX and left as it is.
+    """
+    if name not in VENUE_FIELDS:
+        return value
+
+    def abbreviate(word):
+        lower = word.group().lower()
+        if lower in VENUE_OMITTED:
+            return ''
+        return VENUE_ABBREVIATIONS.get(lower, word.group())
+
+    pieces, depth, start = [], 0, 0
+    for match in _BRACE.finditer(value):
+        if match.group() == '{':
+            if depth == 0:
+                pieces.append(_VENUE_WORD.sub(abbreviate, value[start:match.start()]))
+                start = match.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                pieces.append(value[start:match.end()])
+                start = match.end()
+    pieces.append(value[start:] if depth else _VENUE_WORD.sub(abbreviate, value[start:]))
+    return _WHITESPACE.sub(' ', ''.join(pieces)).strip()